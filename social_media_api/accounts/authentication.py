@@ -0,0 +1,62 @@
+# accounts/authentication.py
+"""Authentication without a database query per request.
+
+`CachedTokenAuthentication` is DRF's `TokenAuthentication` with the
+token → user lookup memoized in the cache for `AUTH_TOKEN_CACHE_TTL`
+seconds (default 60). Entries are keyed by a hash of the token, never the
+token itself, and are dropped when the token is deleted (logout) or its
+user is saved (password change, deactivation, profile edits). Within the
+TTL `request.user` may therefore lag other writes to the user row, such as
+the `F()` counter updates, which do not send signals; read those from the
+database when they matter.
+
+The hot views (feed, likes, the async read path) additionally put Simple
+JWT's `JWTStatelessUserAuthentication` first: it trusts a valid access token
+outright and returns a `TokenUser` built from its claims, so it costs no
+query at all. Those views must only need `request.user.pk`, and a revoked
+user keeps access until their token expires
+(`SIMPLE_JWT["ACCESS_TOKEN_LIFETIME"]`).
+
+`accounts/signals.py` does the invalidation, once when the token or user
+changes and again after the change commits. A miss checks the token once
+more after caching it, so a lookup racing a logout cannot leave the
+revoked token cached. Misses therefore cost two queries.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+
+def token_cache_ttl() -> int:
+    return getattr(settings, "AUTH_TOKEN_CACHE_TTL", 60)
+
+
+def _key(token_key):
+    return "auth:token:" + hashlib.sha256(token_key.encode()).hexdigest()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        cache_key = _key(key)
+        user = cache.get(cache_key)
+        if user is None:
+            user, token = super().authenticate_credentials(key)
+            cache.set(cache_key, user, token_cache_ttl())
+            # a logout or deactivation between the read and the set would
+            # have been invalidated too early; look again now it is cached
+            if not Token.objects.filter(key=key, user__is_active=True).exists():
+                invalidate(key)
+                raise AuthenticationFailed("Invalid token.")
+            return user, token
+        if not user.is_active:
+            raise AuthenticationFailed("User inactive or deleted.")
+        # the token row is not loaded; request.auth only needs the key
+        return user, Token(key=key, user=user)
+
+
+def invalidate(token_key):
+    cache.delete(_key(token_key))
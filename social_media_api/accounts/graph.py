@@ -0,0 +1,102 @@
+# accounts/graph.py
+"""Cached adjacency lists for the follow graph.
+
+Each user's following and follower ids are kept in the cache as a sorted
+array of 64-bit integers (8 bytes per edge), so membership is a binary
+search, intersections are a linear merge and sizes are free, none of which
+touch the `Follow` table once the entry is warm.
+
+Follow/unfollow call `invalidate()` after commit; entries also expire after
+`SOCIAL_GRAPH_CACHE_TTL` seconds so a missed invalidation heals on its own.
+With more than one process the configured cache must be shared.
+"""
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Follow
+
+FOLLOWING = "following"
+FOLLOWERS = "followers"
+
+# direction -> (column to filter on, column to collect)
+_COLUMNS = {
+    FOLLOWING: ("follower_id", "followee_id"),
+    FOLLOWERS: ("followee_id", "follower_id"),
+}
+
+
+def _key(direction, user_id):
+    return f"graph:{direction}:{user_id}"
+
+
+def _ttl():
+    return getattr(settings, "SOCIAL_GRAPH_CACHE_TTL", 3600)
+
+
+def _load(direction, user_id) -> array:
+    blob = cache.get(_key(direction, user_id))
+    if blob is not None:
+        ids = array("q")
+        ids.frombytes(blob)
+        return ids
+
+    where, column = _COLUMNS[direction]
+    ids = array(
+        "q",
+        Follow.objects.filter(**{where: user_id})
+        .order_by(column)
+        .values_list(column, flat=True),
+    )
+    cache.set(_key(direction, user_id), ids.tobytes(), _ttl())
+    return ids
+
+
+def following_ids(user_id) -> array:
+    """Sorted ids of the users `user_id` follows."""
+    return _load(FOLLOWING, user_id)
+
+
+def follower_ids(user_id) -> array:
+    """Sorted ids of the users following `user_id`."""
+    return _load(FOLLOWERS, user_id)
+
+
+def contains(ids, user_id) -> bool:
+    i = bisect_left(ids, user_id)
+    return i < len(ids) and ids[i] == user_id
+
+
+def intersect(a, b) -> list[int]:
+    """Ids present in both sorted arrays."""
+    if len(a) > len(b):
+        a, b = b, a
+    # probe the larger side when the sizes are lopsided, else merge
+    if len(a) * 16 < len(b):
+        return [user_id for user_id in a if contains(b, user_id)]
+
+    common, i, j = [], 0, 0
+    while i < len(a) and j < len(b):
+        if a[i] == b[j]:
+            common.append(a[i])
+            i += 1
+            j += 1
+        elif a[i] < b[j]:
+            i += 1
+        else:
+            j += 1
+    return common
+
+
+def followed_followers(user_id, target_id) -> list[int]:
+    """Users `user_id` follows who also follow `target_id`."""
+    return intersect(following_ids(user_id), follower_ids(target_id))
+
+
+def invalidate(follower_id, followee_id):
+    """Drop the cached lists touched by a follower -> followee edge change."""
+    cache.delete_many(
+        [_key(FOLLOWING, follower_id), _key(FOLLOWERS, followee_id)]
+    )
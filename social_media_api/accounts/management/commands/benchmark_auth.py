@@ -0,0 +1,63 @@
+# accounts/management/commands/benchmark_auth.py
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework_simplejwt.authentication import (
+    JWTAuthentication,
+    JWTStatelessUserAuthentication,
+)
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts import authentication
+from social_media_api import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the per-request cost of each authentication class: time "
+        "spent in authenticate() and the queries it runs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user", required=True, help="username to authenticate as"
+        )
+        parser.add_argument("--iterations", type=int, default=2000)
+        parser.add_argument(
+            "--db-latency",
+            type=float,
+            default=0,
+            help="milliseconds added to every query, to mimic a remote database",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(username=options["user"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user named {options['user']!r}.")
+        token, _ = Token.objects.get_or_create(user=user)
+        access = str(AccessToken.for_user(user))
+        # the cached class warms up on its first, untimed call
+        cache.delete(authentication._key(token.key))
+
+        cases = [
+            ("token", TokenAuthentication(), f"Token {token.key}"),
+            (
+                "token, cached",
+                authentication.CachedTokenAuthentication(),
+                f"Token {token.key}",
+            ),
+            ("jwt", JWTAuthentication(), f"Bearer {access}"),
+            ("jwt, stateless", JWTStatelessUserAuthentication(), f"Bearer {access}"),
+        ]
+        for label, authenticator, header in cases:
+            result = benchmark.run_authentication(
+                label,
+                authenticator,
+                header,
+                iterations=options["iterations"],
+                db_latency=options["db_latency"] / 1000,
+            )
+            self.stdout.write(result.summary())
@@ -0,0 +1,31 @@
+# accounts/management/commands/compute_follow_recommendations.py
+from django.core.management.base import BaseCommand
+
+from accounts import recommendations
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild who-to-follow recommendations: 2-hop neighbors of each user "
+        "ranked by how many of the people they follow already follow them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top-k", type=int, default=recommendations.TOP_K)
+        parser.add_argument(
+            "--batch-size", type=int, default=recommendations.BATCH_SIZE
+        )
+        parser.add_argument(
+            "--max-degree",
+            type=int,
+            default=None,
+            help="Skip expanding followees who follow more than this many users.",
+        )
+
+    def handle(self, *args, **options):
+        written = recommendations.compute(
+            top_k=options["top_k"],
+            batch_size=options["batch_size"],
+            max_degree=options["max_degree"],
+        )
+        self.stdout.write(f"stored {written} recommendation(s)")
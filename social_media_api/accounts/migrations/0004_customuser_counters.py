@@ -0,0 +1,47 @@
+# Generated by Django 6.0 on 2026-10-17 10:05
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_counters(apps, schema_editor):
+    CustomUser = apps.get_model("accounts", "CustomUser")
+    Edge = CustomUser.following.through
+
+    def count_of(column):
+        return Coalesce(
+            Subquery(
+                Edge.objects.filter(**{column: OuterRef("pk")})
+                .values(column)
+                .annotate(total=Count("pk"))
+                .values("total")
+            ),
+            0,
+        )
+
+    CustomUser.objects.update(
+        follower_count=count_of("to_customuser"),
+        following_count=count_of("from_customuser"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_customuser_fan_out_on_read'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='follower_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,99 @@
+# Generated by Django 6.0 on 2026-10-17 14:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def merge_follow_tables(apps, schema_editor):
+    """Copy both legacy M2M tables into Follow edges.
+
+    `following` rows are (user -> followee); `followers` rows are
+    (user <- follower). Duplicates and self-follows are dropped.
+    """
+    CustomUser = apps.get_model("accounts", "CustomUser")
+    Follow = apps.get_model("accounts", "Follow")
+
+    following = CustomUser.following.through.objects.values_list(
+        "from_customuser_id", "to_customuser_id"
+    )
+    followers = CustomUser.followers.through.objects.values_list(
+        "to_customuser_id", "from_customuser_id"
+    )
+    edges = {
+        (follower_id, followee_id)
+        for rows in (following, followers)
+        for follower_id, followee_id in rows.iterator()
+        if follower_id != followee_id
+    }
+    Follow.objects.bulk_create(
+        [
+            Follow(follower_id=follower_id, followee_id=followee_id)
+            for follower_id, followee_id in edges
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+def recount(apps, schema_editor):
+    CustomUser = apps.get_model("accounts", "CustomUser")
+    Follow = apps.get_model("accounts", "Follow")
+
+    def count_of(column):
+        return Coalesce(
+            Subquery(
+                Follow.objects.filter(**{column: OuterRef("pk")})
+                .values(column)
+                .annotate(total=Count("pk"))
+                .values("total")
+            ),
+            0,
+        )
+
+    CustomUser.objects.update(
+        follower_count=count_of("followee"), following_count=count_of("follower")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_customuser_counters'),
+        # the timeline backfill reads the legacy `following` table
+        ('posts', '0003_timelineentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Follow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('followee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='follower_edges', to=settings.AUTH_USER_MODEL)),
+                ('follower', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='following_edges', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['followee', 'follower'], name='follow_followee_idx')],
+                'constraints': [models.UniqueConstraint(fields=('follower', 'followee'), name='unique_follow'), models.CheckConstraint(condition=models.Q(('follower', models.F('followee')), _negated=True), name='no_self_follow')],
+            },
+        ),
+        migrations.RunPython(merge_follow_tables, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='customuser',
+            name='followers',
+        ),
+        # M2M fields cannot be altered to use a `through` model in place
+        migrations.RemoveField(
+            model_name='customuser',
+            name='following',
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='following',
+            field=models.ManyToManyField(blank=True, related_name='followers', through='accounts.Follow', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(recount, migrations.RunPython.noop),
+    ]
@@ -12,14 +12,90 @@ class CustomUser(AbstractUser):
         help_text="Profile picture of the user",
     )
 
+    # user.following → people this user follows
     # user.followers → people who follow this user
-
-    followers = models.ManyToManyField(
-        "self", symmetrical=False, related_name="following_set", blank=True
-    )
+    # both directions are stored once, as `Follow` edges
     following = models.ManyToManyField(
-        "self", symmetrical=False, related_name="followers_set", blank=True
+        "self",
+        through="Follow",
+        symmetrical=False,
+        related_name="followers",
+        blank=True,
     )
 
+    # set once the user has too many followers to fan their posts out on
+    # write; followers' feeds pull this user's posts at read time instead
+    fan_out_on_read = models.BooleanField(default=False, db_index=True)
+
+    # denormalized counters, maintained with F() updates by the follow views
+    follower_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+
     def __str__(self):
         return self.username
+
+
+class Follow(models.Model):
+    """A single follower → followee edge of the social graph."""
+
+    follower = models.ForeignKey(
+        CustomUser, on_delete=models.CASCADE, related_name="following_edges"
+    )
+    followee = models.ForeignKey(
+        CustomUser, on_delete=models.CASCADE, related_name="follower_edges"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            # also the index for "who does X follow"
+            models.UniqueConstraint(
+                fields=["follower", "followee"], name="unique_follow"
+            ),
+            models.CheckConstraint(
+                condition=~models.Q(follower=models.F("followee")),
+                name="no_self_follow",
+            ),
+        ]
+        indexes = [
+            # "who follows X"
+            models.Index(fields=["followee", "follower"], name="follow_followee_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.follower_id} follows {self.followee_id}"
+
+
+class FollowRecommendation(models.Model):
+    """A precomputed "who to follow" suggestion.
+
+    Rows are rebuilt offline by the `compute_follow_recommendations`
+    command; `score` is the number of people `user` follows who already
+    follow `candidate`.
+    """
+
+    user = models.ForeignKey(
+        CustomUser, on_delete=models.CASCADE, related_name="recommendations"
+    )
+    candidate = models.ForeignKey(
+        CustomUser, on_delete=models.CASCADE, related_name="+"
+    )
+    score = models.PositiveIntegerField()
+    computed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "candidate"], name="unique_recommendation"
+            ),
+        ]
+        indexes = [
+            # the endpoint reads one user's top-K in score order
+            models.Index(
+                fields=["user", "-score", "candidate"],
+                name="recommendation_user_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.candidate_id} for {self.user_id} ({self.score})"
@@ -2,7 +2,8 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model, authenticate
 from rest_framework.authtoken.models import Token
-from .models import CustomUser
+from . import graph
+from .models import CustomUser, FollowRecommendation
 
 User = get_user_model()
 
@@ -49,6 +50,10 @@ class LoginSerializer(serializers.Serializer):
 
 
 class UserSerializer(serializers.ModelSerializer):
+    following_set = serializers.PrimaryKeyRelatedField(
+        source="following", many=True, read_only=True
+    )
+
     class Meta:
         model = User
         fields = [
@@ -64,9 +69,28 @@ class UserSerializer(serializers.ModelSerializer):
 
 
 class UserFollowSerializer(serializers.ModelSerializer):
-    followers = serializers.IntegerField(source="followers.count", read_only=True)
-    following = serializers.IntegerField(source="following.count", read_only=True)
+    followers = serializers.IntegerField(source="follower_count", read_only=True)
+    following = serializers.IntegerField(source="following_count", read_only=True)
+    is_following = serializers.SerializerMethodField()
 
     class Meta:
         model = User
-        fields = ["id", "username", "followers", "following"]
+        fields = ["id", "username", "followers", "following", "is_following"]
+
+    def get_is_following(self, obj):
+        request = self.context.get("request")
+        if request is None or not request.user.is_authenticated:
+            return False
+        # load the requester's array once per response, not once per row
+        if "following_ids" not in self.context:
+            self.context["following_ids"] = graph.following_ids(request.user.pk)
+        return graph.contains(self.context["following_ids"], obj.pk)
+
+
+class FollowRecommendationSerializer(serializers.ModelSerializer):
+    user = UserFollowSerializer(source="candidate", read_only=True)
+    mutual_count = serializers.IntegerField(source="score", read_only=True)
+
+    class Meta:
+        model = FollowRecommendation
+        fields = ["user", "mutual_count"]
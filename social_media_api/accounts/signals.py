@@ -0,0 +1,29 @@
+# accounts/signals.py
+"""Drop cached token lookups when a token is deleted or its user changes."""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from . import authentication
+
+
+def _invalidate(key):
+    authentication.invalidate(key)
+    # a lookup that read the old rows may cache them until the change commits
+    transaction.on_commit(lambda: authentication.invalidate(key))
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    _invalidate(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+def user_saved(sender, instance, created, **kwargs):
+    if created:
+        return
+    tokens = Token.objects.filter(user_id=instance.pk).values_list("key", flat=True)
+    for key in tokens:
+        _invalidate(key)
@@ -1,3 +1,258 @@
-from django.test import TestCase
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.request import Request
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from posts.models import Like, Post
+
+from . import graph, recommendations
+from .authentication import CachedTokenAuthentication
+from .models import Follow, FollowRecommendation
+
+User = get_user_model()
+
+
+class FollowEdgeTests(TestCase):
+    """Both directions of the graph are served by one Follow table."""
+
+    client: APIClient
+
+    def setUp(self):
+        self.client = APIClient()
+        self.alice = User.objects.create(username="alice")
+        self.bob = User.objects.create(username="bob")
+        self.client.force_authenticate(self.alice)
+
+    def test_follow_and_unfollow_write_one_edge(self):
+        self.client.post(f"/api/accounts/follow/{self.bob.pk}/")
+        self.client.post(f"/api/accounts/follow/{self.bob.pk}/")
+
+        edge = Follow.objects.get()
+        self.assertEqual((edge.follower, edge.followee), (self.alice, self.bob))
+        self.assertEqual(list(self.alice.following.all()), [self.bob])
+        self.assertEqual(list(self.bob.followers.all()), [self.alice])
+        self.bob.refresh_from_db()
+        self.assertEqual(self.bob.follower_count, 1)
+
+        self.client.post(f"/api/accounts/unfollow/{self.bob.pk}/")
+        self.assertFalse(Follow.objects.exists())
+        self.bob.refresh_from_db()
+        self.assertEqual(self.bob.follower_count, 0)
+
+    def test_constraints(self):
+        Follow.objects.create(follower=self.alice, followee=self.bob)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Follow.objects.create(follower=self.alice, followee=self.bob)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Follow.objects.create(follower=self.alice, followee=self.alice)
+
+
+# on-commit hooks run inline here; keep the outbox thread out of the test DB
+@override_settings(NOTIFICATIONS_OUTBOX_WORKER="external")
+class GraphCacheTests(TestCase):
+    """Adjacency arrays are served from the cache and dropped on change."""
+
+    client: APIClient
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.alice, self.bob, self.carol, self.dave = [
+            User.objects.create(username=name)
+            for name in ("alice", "bob", "carol", "dave")
+        ]
+        self.client.force_authenticate(self.alice)
+
+    def follow(self, user, target):
+        self.client.force_authenticate(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/api/accounts/follow/{target.pk}/")
+
+    def test_membership_and_intersections(self):
+        self.follow(self.alice, self.bob)
+        self.follow(self.alice, self.carol)
+        self.follow(self.bob, self.alice)
+        self.follow(self.bob, self.dave)
+        self.follow(self.carol, self.dave)
+
+        following = graph.following_ids(self.alice.pk)
+        self.assertTrue(graph.contains(following, self.bob.pk))
+        with self.assertNumQueries(0):
+            following = graph.following_ids(self.alice.pk)
+            self.assertFalse(graph.contains(following, self.dave.pk))
+            self.assertEqual(len(following), 2)
+        self.assertEqual(
+            graph.intersect(following, graph.follower_ids(self.alice.pk)),
+            [self.bob.pk],
+        )
+        self.assertEqual(
+            graph.followed_followers(self.alice.pk, self.dave.pk),
+            [self.bob.pk, self.carol.pk],
+        )
+
+        self.client.force_authenticate(self.alice)
+        response = self.client.get(f"/api/accounts/followed-followers/{self.dave.pk}/")
+        self.assertEqual(
+            [(u["username"], u["is_following"]) for u in response.data["results"]],
+            [("bob", True), ("carol", True)],
+        )
+
+    def test_follow_and_unfollow_invalidate(self):
+        self.assertEqual(len(graph.follower_ids(self.bob.pk)), 0)  # warm
+        self.follow(self.alice, self.bob)
+        self.assertEqual(list(graph.follower_ids(self.bob.pk)), [self.alice.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/api/accounts/unfollow/{self.bob.pk}/")
+        following = graph.following_ids(self.alice.pk)
+        self.assertFalse(graph.contains(following, self.bob.pk))
+        self.assertEqual(len(graph.follower_ids(self.bob.pk)), 0)
+
+
+class FollowRecommendationTests(TestCase):
+    """2-hop neighbors are ranked by common connections and served precomputed."""
+
+    client: APIClient
+
+    def setUp(self):
+        self.client = APIClient()
+        names = ("alice", "bob", "carol", "dave", "erin")
+        self.alice, self.bob, self.carol, self.dave, self.erin = [
+            User.objects.create(username=name) for name in names
+        ]
+        for follower, followee in [
+            (self.alice, self.bob),
+            (self.alice, self.carol),
+            (self.bob, self.dave),
+            (self.carol, self.dave),
+            (self.bob, self.erin),
+            (self.bob, self.alice),
+        ]:
+            Follow.objects.create(follower=follower, followee=followee)
+
+    def test_compute_and_serve(self):
+        out = StringIO()
+        call_command("compute_follow_recommendations", stdout=out)
+        self.assertIn("stored", out.getvalue())
+
+        self.client.force_authenticate(self.alice)
+        response = self.client.get("/api/accounts/recommendations/")
+        self.assertEqual(
+            [
+                (r["user"]["username"], r["mutual_count"])
+                for r in response.data["results"]
+            ],
+            [("dave", 2), ("erin", 1)],
+        )
+
+        # followed since the last run: hidden without recomputing
+        Follow.objects.create(follower=self.alice, followee=self.dave)
+        response = self.client.get("/api/accounts/recommendations/")
+        self.assertEqual(
+            [r["user"]["username"] for r in response.data["results"]], ["erin"]
+        )
+
+    def test_rerun_replaces_rows(self):
+        recommendations.compute(top_k=1)
+        recommendations.compute(top_k=1)
+        self.assertEqual(
+            list(
+                FollowRecommendation.objects.filter(user=self.alice).values_list(
+                    "candidate__username", "score"
+                )
+            ),
+            [("dave", 2)],
+        )
+
+
+# on-commit hooks run inline here; keep the outbox thread out of the test DB
+@override_settings(NOTIFICATIONS_OUTBOX_WORKER="external")
+class AuthenticationCacheTests(TestCase):
+    """Token lookups are cached until logout or a user save; JWT needs none."""
+
+    client: APIClient
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.alice = User.objects.create(username="alice")
+        self.token = Token.objects.create(user=self.alice)
+
+    def authenticate(self, key):
+        request = RequestFactory().get("/", HTTP_AUTHORIZATION=f"Token {key}")
+        return CachedTokenAuthentication().authenticate(Request(request))
+
+    def test_cached_lookup_costs_no_query(self):
+        with self.assertNumQueries(2):
+            self.authenticate(self.token.key)
+        with self.assertNumQueries(0):
+            user, auth = self.authenticate(self.token.key)
+        self.assertEqual((user, auth.key), (self.alice, self.token.key))
+
+    def test_logout_revokes_the_cached_token(self):
+        self.authenticate(self.token.key)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+        response = self.client.post("/api/accounts/logout/")
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Token.objects.exists())
+        response = self.client.get("/api/accounts/recommendations/")
+        self.assertEqual(response.status_code, 401)
+
+    def test_logout_racing_a_miss_is_not_cached(self):
+        lookup = TokenAuthentication.authenticate_credentials
+
+        def logout_after_read(auth, key):
+            # the token is read, then revoked (as logout does) before the
+            # result is cached
+            result = lookup(auth, key)
+            Token.objects.filter(key=key).delete()
+            return result
+
+        with mock.patch.object(
+            TokenAuthentication, "authenticate_credentials", logout_after_read
+        ):
+            with self.assertRaises(AuthenticationFailed):
+                self.authenticate(self.token.key)
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(self.token.key)
+
+    def test_user_save_drops_the_cached_user(self):
+        self.authenticate(self.token.key)
+        self.alice.set_password("changed")
+        self.alice.is_active = False
+        self.alice.save()
+
+        with self.assertNumQueries(1), self.assertRaises(AuthenticationFailed):
+            self.authenticate(self.token.key)
+
+    def test_jwt_feed_and_like_load_no_user(self):
+        post = Post.objects.create(
+            author=User.objects.create(username="bob"), title="t", content="c"
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.alice)}"
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            feed = self.client.get("/api/feed/")
+            like = self.client.put(f"/api/posts/{post.pk}/like/")
+        self.assertEqual((feed.status_code, like.status_code), (200, 200))
+        self.assertTrue(Like.objects.filter(user=self.alice, post=post).exists())
+        user_lookups = [
+            query["sql"]
+            for query in queries
+            if 'FROM "accounts_customuser" WHERE' in query["sql"]
+        ]
+        self.assertEqual(user_lookups, [])
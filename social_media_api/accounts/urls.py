@@ -1,12 +1,31 @@
 # accounts/urls.py
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import RegisterView, LoginView, FollowUserView, UnfollowUserView
+from .views import (
+    RegisterView,
+    LoginView,
+    LogoutView,
+    FollowUserView,
+    UnfollowUserView,
+    FollowedFollowersView,
+    FollowRecommendationView,
+)
 
 
 urlpatterns = [
     path("register/", RegisterView.as_view(), name="register"),
     path("login/", LoginView.as_view(), name="login"),
+    path("logout/", LogoutView.as_view(), name="logout"),
     path("follow/<int:user_id>/", FollowUserView.as_view(), name="follow-user"),
     path("unfollow/<int:user_id>/", UnfollowUserView.as_view(), name="unfollow-user"),
+    path(
+        "followed-followers/<int:user_id>/",
+        FollowedFollowersView.as_view(),
+        name="followed-followers",
+    ),
+    path(
+        "recommendations/",
+        FollowRecommendationView.as_view(),
+        name="follow-recommendations",
+    ),
 ]
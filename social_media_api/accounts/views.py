@@ -6,12 +6,14 @@ from rest_framework.permissions import AllowAny
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
-from .models import CustomUser
+from rest_framework.authtoken.models import Token
+from .models import CustomUser, Follow, FollowRecommendation
 from .serializers import (
     RegisterSerializer,
     LoginSerializer,
     UserSerializer,
     UserFollowSerializer,
+    FollowRecommendationSerializer,
 )
 
 
@@ -56,14 +58,31 @@ class LoginView(APIView):
         )
 
 
+class LogoutView(APIView):
+    """Revoke the user's API token; the next login issues a new one.
+
+    JWT access tokens are stateless and stay valid until they expire.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        # deleting the token also drops its cached lookup
+        Token.objects.filter(user_id=request.user.pk).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 class UserDetailView(generics.RetrieveAPIView):
     queryset = CustomUser.objects.all()
     serializer_class = UserSerializer
 
 
 from django.shortcuts import get_object_or_404
-from notifications.models import Notification
-from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import F
+from notifications import outbox
+from posts import timeline
+from . import graph
 
 
 class FollowUserView(generics.GenericAPIView):
@@ -81,21 +100,27 @@ class FollowUserView(generics.GenericAPIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # static checkers may not know request.user is CustomUser, but runtime will work
-        request.user.following.add(target)
-
-        # create a notification for the user being followed
-        if target != request.user:
-            Notification.objects.create(
-                recipient=target,
-                actor=request.user,
-                verb="started following you",
-                target=request.user,
-                target_content_type=ContentType.objects.get_for_model(
-                    request.user.__class__
-                ),
-                target_object_id=request.user.id,
+        with transaction.atomic():
+            _, created = Follow.objects.get_or_create(
+                follower=request.user, followee=target
             )
+            if created:
+                CustomUser.objects.filter(pk=request.user.pk).update(
+                    following_count=F("following_count") + 1
+                )
+                CustomUser.objects.filter(pk=target.pk).update(
+                    follower_count=F("follower_count") + 1
+                )
+                transaction.on_commit(
+                    lambda: graph.invalidate(request.user.pk, target.pk)
+                )
+                # queue a notification for the user being followed
+                outbox.enqueue(
+                    target.pk, request.user.pk, "started following you", request.user
+                )
+
+        if created:
+            timeline.backfill(request.user, target)
 
         return Response(
             {"detail": f"You are now following {target.username}."},
@@ -118,8 +143,52 @@ class UnfollowUserView(generics.GenericAPIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        request.user.following.remove(target)
+        with transaction.atomic():
+            removed, _ = Follow.objects.filter(
+                follower=request.user, followee=target
+            ).delete()
+            if removed:
+                CustomUser.objects.filter(
+                    pk=request.user.pk, following_count__gt=0
+                ).update(following_count=F("following_count") - 1)
+                CustomUser.objects.filter(pk=target.pk, follower_count__gt=0).update(
+                    follower_count=F("follower_count") - 1
+                )
+                transaction.on_commit(
+                    lambda: graph.invalidate(request.user.pk, target.pk)
+                )
+        timeline.trim(request.user, target)
         return Response(
             {"detail": f"You have unfollowed {target.username}."},
             status=status.HTTP_200_OK,
         )
+
+
+class FollowedFollowersView(generics.ListAPIView):
+    """Users the requester follows who also follow `user_id`."""
+
+    serializer_class = UserFollowSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        target = get_object_or_404(CustomUser, pk=self.kwargs["user_id"])
+        ids = graph.followed_followers(self.request.user.pk, target.pk)
+        return CustomUser.objects.filter(pk__in=ids).order_by("username")
+
+
+class FollowRecommendationView(generics.ListAPIView):
+    """Precomputed who-to-follow suggestions for the requester, best first."""
+
+    serializer_class = FollowRecommendationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        user = self.request.user
+        # drop candidates followed since the last offline run
+        followed = Follow.objects.filter(follower=user).values("followee_id")
+        return (
+            FollowRecommendation.objects.filter(user=user)
+            .exclude(candidate_id__in=followed)
+            .select_related("candidate")
+            .order_by("-score", "candidate_id")
+        )
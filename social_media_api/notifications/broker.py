@@ -0,0 +1,136 @@
+# notifications/broker.py
+"""Publish/subscribe for pushing notifications to connected clients.
+
+The outbox publishes each delivered notification to its recipient once the
+delivery commits; `/notifications/stream/` subscribes for the duration of a
+connection. The broker is chosen with `NOTIFICATIONS_BROKER` (a dotted path,
+default `InProcessBroker`).
+
+`InProcessBroker` only reaches connections served by the process that
+delivered the notification, which holds with the default local outbox
+worker and a single ASGI process. Several processes, or an external
+`process_notification_outbox` worker, need a shared broker (e.g. one built
+on Redis pub/sub) implementing the same three methods.
+
+Every subscription has a bounded queue. A client that stops reading and
+lets it fill is not allowed to hold memory: its queue is dropped and it
+receives `OVERFLOW`, after which the stream ends and the client reconnects
+with `Last-Event-ID`, catching up from the database.
+"""
+import asyncio
+import logging
+import threading
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW = object()
+
+
+def queue_size() -> int:
+    return getattr(settings, "NOTIFICATIONS_STREAM_QUEUE_SIZE", 100)
+
+
+class Subscription:
+    """One connection's queue; must be created inside its event loop."""
+
+    def __init__(self, user_id, maxsize):
+        self.user_id = user_id
+        self.overflowed = False
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize)
+
+    def deliver(self, event):
+        """Hand `event` over from any thread; never blocks the publisher."""
+        self._loop.call_soon_threadsafe(self._offer, event)
+
+    def _offer(self, event):
+        if self.overflowed:
+            return
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(OVERFLOW)
+
+    async def get(self):
+        return await self._queue.get()
+
+
+class Broker(ABC):
+    @abstractmethod
+    def publish(self, user_id, event):
+        """Send `event` (a JSON-serializable dict) to `user_id`'s streams."""
+
+    @abstractmethod
+    def subscribe(self, user_id) -> Subscription:
+        """A new `Subscription` receiving `user_id`'s events."""
+
+    @abstractmethod
+    def unsubscribe(self, subscription):
+        """Stop delivering to `subscription`; a no-op if already removed."""
+
+    def listening(self, user_ids) -> set:
+        """Which of `user_ids` may have a stream open; lets publishers skip
+        serializing events nobody receives. Defaults to all of them."""
+        return set(user_ids)
+
+
+class InProcessBroker(Broker):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = {}
+
+    def publish(self, user_id, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.deliver(event)
+            except RuntimeError:
+                # its event loop is closed; the connection is long gone
+                logger.warning("Dropping a stale notification subscription")
+                self.unsubscribe(subscription)
+
+    def subscribe(self, user_id) -> Subscription:
+        subscription = Subscription(user_id, queue_size())
+        with self._lock:
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is None:
+                return
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.user_id]
+
+    def listening(self, user_ids) -> set:
+        with self._lock:
+            return {
+                user_id for user_id in user_ids if user_id in self._subscriptions
+            }
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker() -> Broker:
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            path = getattr(
+                settings,
+                "NOTIFICATIONS_BROKER",
+                "notifications.broker.InProcessBroker",
+            )
+            _broker = import_string(path)()
+        return _broker
@@ -0,0 +1,50 @@
+# notifications/counters.py
+"""Per-user unread notification counters kept in the cache.
+
+Delivery increments the counter, marking notifications read decrements or
+resets it, and a cold (missing/evicted) counter is rebuilt with one COUNT.
+Entries expire after NOTIFICATIONS_UNREAD_COUNT_TTL seconds so any drift
+heals on its own. With more than one process (e.g. an external outbox
+worker) the configured cache must be shared, such as Redis or Memcached.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Notification
+
+
+def _key(user_id):
+    return f"notifications:unread:{user_id}"
+
+
+def _ttl():
+    return getattr(settings, "NOTIFICATIONS_UNREAD_COUNT_TTL", 300)
+
+
+def unread_count(user_id) -> int:
+    count = cache.get(_key(user_id))
+    if count is None:
+        count = Notification.objects.filter(recipient_id=user_id, is_read=False).count()
+        # add() so a counter incremented meanwhile is not overwritten
+        cache.add(_key(user_id), count, _ttl())
+    return max(count, 0)
+
+
+def incr(user_id, delta=1):
+    try:
+        cache.incr(_key(user_id), delta)
+    except ValueError:
+        # cold counter: the next read recomputes it
+        pass
+
+
+def decr(user_id, delta=1):
+    incr(user_id, -delta)
+
+
+def reset(user_id):
+    cache.set(_key(user_id), 0, _ttl())
+
+
+def invalidate(user_id):
+    cache.delete(_key(user_id))
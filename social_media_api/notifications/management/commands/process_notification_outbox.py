@@ -0,0 +1,36 @@
+# notifications/management/commands/process_notification_outbox.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications import outbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver pending notifications from the outbox in batches. Runs "
+        "until interrupted unless --once is given. Set "
+        'NOTIFICATIONS_OUTBOX_WORKER = "external" when running this so the '
+        "web process does not drain the outbox itself."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=outbox.BATCH_SIZE)
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Seconds to sleep when the outbox is empty.",
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="Drain the outbox once and exit."
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            delivered = outbox.drain(options["batch_size"])
+            if delivered:
+                self.stdout.write(f"delivered {delivered} notification(s)")
+            if options["once"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,52 @@
+# notifications/management/commands/prune_notifications.py
+from django.core.management.base import BaseCommand
+
+from notifications import retention
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete read notifications older than the retention period and trim "
+        "users above the per-user cap, in batches, optionally archiving the "
+        "deleted rows to monthly .jsonl.gz files first. Stops after "
+        "--time-budget seconds; run it again to continue."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            help="Keep read notifications this many days "
+            "(default NOTIFICATIONS_RETENTION_DAYS).",
+        )
+        parser.add_argument(
+            "--max-per-user",
+            type=int,
+            help="Keep at most this many per user, 0 for no cap "
+            "(default NOTIFICATIONS_MAX_PER_USER).",
+        )
+        parser.add_argument("--batch-size", type=int, default=retention.BATCH_SIZE)
+        parser.add_argument(
+            "--time-budget",
+            type=float,
+            default=60.0,
+            help="Seconds after which no new batch is started.",
+        )
+        parser.add_argument(
+            "--archive-dir", help="Append deleted rows to gzipped JSONL files here."
+        )
+
+    def handle(self, *args, **options):
+        result = retention.prune(
+            days=options["days"],
+            per_user=options["max_per_user"],
+            batch_size=options["batch_size"],
+            time_budget=options["time_budget"],
+            archive_dir=options["archive_dir"],
+        )
+        self.stdout.write(
+            f"deleted {result.expired} expired and {result.capped} over-cap "
+            f"notification(s), archived {result.archived}"
+        )
+        if not result.finished:
+            self.stdout.write("time budget spent; run again to continue")
@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-17 21:10
+
+from django.db import migrations, models
+
+
+def seed_actor_ids(apps, schema_editor):
+    # only unread rows still coalesce; the sample is all that is known of
+    # their earlier actors
+    Notification = apps.get_model("notifications", "Notification")
+    rows = list(Notification.objects.filter(is_read=False).only("sample_actors"))
+    for notification in rows:
+        notification.actor_ids = [a["id"] for a in notification.sample_actors]
+    Notification.objects.bulk_update(rows, ["actor_ids"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0005_notification_retention_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='actor_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.RunPython(seed_actor_ids, migrations.RunPython.noop),
+    ]
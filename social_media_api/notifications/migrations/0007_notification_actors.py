@@ -0,0 +1,61 @@
+# Generated by Django 6.0 on 2026-10-17 22:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def seed_actors(apps, schema_editor):
+    # only unread rows still coalesce. Rows from before 0003 have an empty
+    # sample, so 0006 gave them no actor_ids either; `actor` is their one
+    # known actor
+    Notification = apps.get_model("notifications", "Notification")
+    NotificationActor = apps.get_model("notifications", "NotificationActor")
+    rows = list(
+        Notification.objects.filter(is_read=False)
+        .select_related("actor")
+        .only("actor__username", "sample_actors", "actor_ids")
+    )
+    links = []
+    for notification in rows:
+        if not notification.sample_actors:
+            notification.sample_actors = [
+                {"id": notification.actor_id, "username": notification.actor.username}
+            ]
+        actor_ids = [notification.actor_id, *notification.actor_ids]
+        actor_ids += [a["id"] for a in notification.sample_actors]
+        links += [
+            NotificationActor(notification_id=notification.pk, actor_id=actor_id)
+            for actor_id in dict.fromkeys(actor_ids)
+        ]
+    Notification.objects.bulk_update(rows, ["sample_actors"], batch_size=1000)
+    NotificationActor.objects.bulk_create(
+        links, batch_size=1000, ignore_conflicts=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0006_notification_actor_ids'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationActor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('actor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('notification', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='notifications.notification')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('notification', 'actor'), name='notification_actor_unique')],
+            },
+        ),
+        migrations.RunPython(seed_actors, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='notification',
+            name='actor_ids',
+        ),
+    ]
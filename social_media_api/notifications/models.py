@@ -24,8 +24,90 @@ class Notification(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
     is_read = models.BooleanField(default=False)
 
+    # coalescing: repeated (recipient, verb, target) events inside
+    # NOTIFICATION_COALESCE_WINDOW update one row instead of adding rows.
+    # `actor` is the most recent actor, `sample_actors` the latest few
+    # as [{"id": ..., "username": ...}]; every distinct actor so far has a
+    # `NotificationActor` row, so `actor_count` counts a returning actor once
+    actor_count = models.PositiveIntegerField(default=1)
+    sample_actors = models.JSONField(default=list, blank=True)
+
     class Meta:
         ordering = ["-timestamp"]
+        indexes = [
+            # NotificationViewSet listing: unread first, newest first
+            models.Index(
+                fields=["recipient", "is_read", "-timestamp"],
+                name="notification_inbox_idx",
+            ),
+            # unread-only reads (unread list, unread counter, coalescing);
+            # partial where the backend supports it
+            models.Index(
+                fields=["recipient", "-timestamp"],
+                name="notification_unread_idx",
+                condition=models.Q(is_read=False),
+            ),
+            # retention: read notifications past NOTIFICATIONS_RETENTION_DAYS
+            models.Index(
+                fields=["timestamp"],
+                name="notification_read_age_idx",
+                condition=models.Q(is_read=True),
+            ),
+        ]
 
     def __str__(self):
+        if self.actor_count > 1:
+            others = self.actor_count - 1
+            noun = "others" if others > 1 else "other"
+            return f"{self.actor} and {others} {noun} {self.verb}"
         return f"{self.actor} {self.verb} {self.target}"
+
+
+class NotificationActor(models.Model):
+    """One distinct actor of a coalesced notification.
+
+    Delivery inserts a row per (notification, actor) and skips the ones that
+    exist, so a viral post adds one narrow row per new actor instead of
+    rewriting a growing list on the notification itself.
+    """
+
+    notification = models.ForeignKey(
+        Notification, on_delete=models.CASCADE, related_name="+"
+    )
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+"
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["notification", "actor"], name="notification_actor_unique"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.actor_id} -> {self.notification_id}"
+
+
+class NotificationOutbox(models.Model):
+    """A notification waiting to be delivered.
+
+    Rows are written in the same transaction as the event that caused them
+    (like, comment, follow) and turned into `Notification`s in batches by
+    `notifications.outbox.drain`, keeping notification writes off the
+    request path.
+    """
+
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+"
+    )
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+"
+    )
+    verb = models.CharField(max_length=255)
+    target_content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    target_object_id = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.actor_id} {self.verb} -> {self.recipient_id}"
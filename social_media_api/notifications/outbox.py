@@ -0,0 +1,229 @@
+# notifications/outbox.py
+"""Transactional outbox for notifications.
+
+Views call `enqueue()` inside the transaction that records the event, which
+costs one narrow INSERT. `drain()` later turns outbox rows into
+`Notification`s with `bulk_create` and deletes them, either from the
+`process_notification_outbox` management command or, when
+`NOTIFICATIONS_OUTBOX_WORKER = "local"` (the default), from a daemon thread in
+the web process that is woken after each commit.
+
+Delivery coalesces bursts ("alice and 41 others liked your post") so the
+notification table grows with distinct targets rather than with engagement.
+"""
+import logging
+import threading
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import close_old_connections, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from . import counters, stream
+from .models import Notification, NotificationActor, NotificationOutbox
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+SAMPLE_SIZE = 3
+
+
+def coalesce_window() -> timedelta:
+    return getattr(settings, "NOTIFICATION_COALESCE_WINDOW", timedelta(hours=6))
+
+
+def enqueue(recipient_id, actor_id, verb, target):
+    """Record a notification to be delivered once the transaction commits."""
+    NotificationOutbox.objects.create(
+        recipient_id=recipient_id,
+        actor_id=actor_id,
+        verb=verb,
+        target_content_type=ContentType.objects.get_for_model(target),
+        target_object_id=target.pk,
+    )
+    transaction.on_commit(_wake_local_worker)
+
+
+def enqueue_many(events):
+    """Queue `(recipient_id, actor_id, verb, target)` events in one INSERT."""
+    rows = [
+        NotificationOutbox(
+            recipient_id=recipient_id,
+            actor_id=actor_id,
+            verb=verb,
+            target_content_type=ContentType.objects.get_for_model(target),
+            target_object_id=target.pk,
+        )
+        for recipient_id, actor_id, verb, target in events
+    ]
+    if rows:
+        NotificationOutbox.objects.bulk_create(rows)
+        transaction.on_commit(_wake_local_worker)
+
+
+def drain_batch(batch_size=BATCH_SIZE) -> int:
+    """Deliver up to `batch_size` outbox rows; returns how many were handled."""
+    with transaction.atomic():
+        # skip_locked lets several workers share the outbox on backends that
+        # support it; it is a no-op on SQLite
+        pending = list(
+            NotificationOutbox.objects.select_for_update(skip_locked=True).order_by(
+                "id"
+            )[:batch_size]
+        )
+        if not pending:
+            return 0
+
+        _deliver(pending)
+        NotificationOutbox.objects.filter(pk__in=[row.pk for row in pending]).delete()
+    return len(pending)
+
+
+def _deliver(pending):
+    """Coalesce outbox rows into new or existing notifications.
+
+    Rows sharing (recipient, verb, target) with each other or with an unread
+    notification younger than the coalesce window are folded into a single
+    row: the latest actor becomes `actor`, `actor_count` counts the distinct
+    `NotificationActor` rows and `sample_actors` keeps the most recent few.
+    """
+    groups = {}
+    for row in pending:
+        key = (
+            row.recipient_id,
+            row.verb,
+            row.target_content_type_id,
+            row.target_object_id,
+        )
+        groups.setdefault(key, []).append(row)
+
+    usernames = dict(
+        get_user_model()
+        .objects.filter(pk__in={row.actor_id for row in pending})
+        .values_list("pk", "username")
+    )
+
+    now = timezone.now()
+    existing = {}
+    candidates = Notification.objects.filter(
+        is_read=False,
+        timestamp__gte=now - coalesce_window(),
+        recipient_id__in={key[0] for key in groups},
+        target_object_id__in={key[3] for key in groups},
+    ).order_by("timestamp")
+    for notification in candidates:
+        key = (
+            notification.recipient_id,
+            notification.verb,
+            notification.target_content_type_id,
+            notification.target_object_id,
+        )
+        if key in groups:
+            existing[key] = notification  # newest wins
+
+    to_create, to_update, actors_by_notification = [], [], []
+    for key, rows in groups.items():
+        # newest actor first, each actor once
+        actors = list(dict.fromkeys(row.actor_id for row in reversed(rows)))
+        notification = existing.get(key)
+        if notification is None:
+            recipient_id, verb, content_type_id, object_id = key
+            notification = Notification(
+                recipient_id=recipient_id,
+                verb=verb,
+                target_content_type_id=content_type_id,
+                target_object_id=object_id,
+                actor_count=len(actors),
+            )
+            to_create.append(notification)
+        else:
+            notification.timestamp = now
+            to_update.append(notification)
+
+        notification.actor_id = actors[0]
+        sample = [{"id": a, "username": usernames.get(a, "")} for a in actors]
+        sample += [a for a in notification.sample_actors if a["id"] not in actors]
+        notification.sample_actors = sample[:SAMPLE_SIZE]
+        actors_by_notification.append((notification, actors))
+
+    Notification.objects.bulk_create(to_create)
+    # returning actors hit the unique constraint and are skipped
+    NotificationActor.objects.bulk_create(
+        [
+            NotificationActor(notification=notification, actor_id=actor_id)
+            for notification, actors in actors_by_notification
+            for actor_id in actors
+        ],
+        ignore_conflicts=True,
+    )
+    if to_update:
+        counts = dict(
+            NotificationActor.objects.filter(notification__in=to_update)
+            .values_list("notification")
+            .annotate(Count("pk"))
+        )
+        for notification in to_update:
+            notification.actor_count = counts[notification.pk]
+    Notification.objects.bulk_update(
+        to_update, ["actor", "actor_count", "sample_actors", "timestamp"]
+    )
+
+    # coalesced rows were already unread; only new rows move the counters
+    new_unread = Counter(notification.recipient_id for notification in to_create)
+    transaction.on_commit(lambda: _bump_unread_counters(new_unread))
+    # a push failure must not fail the drain; clients catch up on reconnect
+    delivered = to_create + to_update
+    transaction.on_commit(lambda: stream.publish(delivered), robust=True)
+
+
+def _bump_unread_counters(new_unread):
+    for recipient_id, count in new_unread.items():
+        counters.incr(recipient_id, count)
+
+
+def drain(batch_size=BATCH_SIZE) -> int:
+    """Deliver every pending outbox row, one batch at a time."""
+    total = 0
+    while True:
+        delivered = drain_batch(batch_size)
+        total += delivered
+        if delivered < batch_size:
+            return total
+
+
+# --- local in-process worker -------------------------------------------------
+
+_wakeup = threading.Event()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def _wake_local_worker():
+    if getattr(settings, "NOTIFICATIONS_OUTBOX_WORKER", "local") != "local":
+        return
+
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(
+                target=_run_local_worker, name="notification-outbox", daemon=True
+            )
+            _worker.start()
+    _wakeup.set()
+
+
+def _run_local_worker():
+    while True:
+        _wakeup.wait()
+        _wakeup.clear()
+        try:
+            drain()
+        except Exception:
+            # rows stay in the outbox and are retried on the next wakeup
+            logger.exception("Failed to drain the notification outbox")
+        finally:
+            close_old_connections()
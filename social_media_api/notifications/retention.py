@@ -0,0 +1,175 @@
+# notifications/retention.py
+"""Retention for the notification table.
+
+Two rules keep it from growing without bound:
+
+* read notifications older than `NOTIFICATIONS_RETENTION_DAYS` (default 90)
+  are deleted;
+* a user with more than `NOTIFICATIONS_MAX_PER_USER` (default 1000) keeps
+  only that many of their newest, read or not.
+
+`prune()` deletes in primary-key batches of one short DELETE each (plus
+one for the batch's `NotificationActor` rows), and stops starting new
+batches once its time budget is spent,
+so it can run from cron every few minutes and pick up where it stopped.
+
+With an archive directory, each batch is first appended to gzip-compressed
+JSON Lines files, one per month of `timestamp`
+(`notifications-2026-03.jsonl.gz`). Appending adds a gzip member, which
+`zcat` and `gzip.open()` read back as one stream. A batch is archived
+before it is deleted, so a crash in between archives it twice on the next
+run; deduplicate on `id` when loading.
+"""
+import gzip
+import json
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from . import counters
+from .models import Notification
+
+BATCH_SIZE = 1000
+
+ARCHIVE_FIELDS = (
+    "id",
+    "recipient_id",
+    "actor_id",
+    "verb",
+    "target_content_type__app_label",
+    "target_content_type__model",
+    "target_object_id",
+    "timestamp",
+    "is_read",
+    "actor_count",
+    "sample_actors",
+)
+
+
+def retention_days() -> int:
+    return getattr(settings, "NOTIFICATIONS_RETENTION_DAYS", 90)
+
+
+def max_per_user() -> int:
+    return getattr(settings, "NOTIFICATIONS_MAX_PER_USER", 1000)
+
+
+@dataclass
+class PruneResult:
+    expired: int = 0
+    capped: int = 0
+    archived: int = 0
+    finished: bool = True
+
+
+class Archive:
+    """Appends notification rows to per-month `.jsonl.gz` files."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def path(self, timestamp) -> Path:
+        return self.directory / f"notifications-{timestamp:%Y-%m}.jsonl.gz"
+
+    def write(self, queryset) -> int:
+        by_month = {}
+        for row in queryset.order_by("pk").values(*ARCHIVE_FIELDS):
+            row["target_content_type"] = "{}.{}".format(
+                row.pop("target_content_type__app_label"),
+                row.pop("target_content_type__model"),
+            )
+            by_month.setdefault(self.path(row["timestamp"]), []).append(row)
+
+        for path, rows in by_month.items():
+            with gzip.open(path, "at", encoding="utf-8") as archive:
+                for row in rows:
+                    archive.write(json.dumps(row, cls=DjangoJSONEncoder) + "\n")
+        return sum(len(rows) for rows in by_month.values())
+
+
+def prune(
+    days=None,
+    per_user=None,
+    batch_size=BATCH_SIZE,
+    time_budget=None,
+    archive_dir=None,
+    now=None,
+) -> PruneResult:
+    """Apply both retention rules; `per_user=0` disables the cap.
+
+    `result.finished` is False when the time budget ran out first.
+    """
+    days = retention_days() if days is None else days
+    per_user = max_per_user() if per_user is None else per_user
+    now = now or timezone.now()
+    deadline = None if time_budget is None else time.monotonic() + time_budget
+    archive = Archive(archive_dir) if archive_dir else None
+    result = PruneResult()
+
+    def batches(queryset):
+        """Delete `queryset` batch by batch while time remains."""
+        while True:
+            if deadline is not None and time.monotonic() >= deadline:
+                result.finished = False
+                return
+            deleted, archived = _delete_batch(queryset, batch_size, archive)
+            result.archived += archived
+            yield deleted
+            if deleted < batch_size:
+                return
+
+    expired = Notification.objects.filter(
+        is_read=True, timestamp__lt=now - timedelta(days=days)
+    )
+    result.expired = sum(batches(expired))
+
+    if per_user and result.finished:
+        over_cap = (
+            Notification.objects.values("recipient_id")
+            .annotate(total=Count("id"))
+            .filter(total__gt=per_user)
+            .values_list("recipient_id", flat=True)
+        )
+        for recipient_id in over_cap:
+            capped = sum(batches(_beyond_cap(recipient_id, per_user)))
+            if capped:
+                # some of them may have been unread
+                counters.invalidate(recipient_id)
+            result.capped += capped
+            if not result.finished:
+                break
+    return result
+
+
+def _beyond_cap(recipient_id, keep):
+    """The recipient's notifications older than their newest `keep`."""
+    owned = Notification.objects.filter(recipient_id=recipient_id)
+    boundary = (
+        owned.order_by("-timestamp", "-id").values_list("timestamp", "id")[keep:]
+    ).first()
+    if boundary is None:
+        return owned.none()
+    timestamp, pk = boundary
+    return owned.filter(Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lte=pk))
+
+
+def _delete_batch(queryset, batch_size, archive):
+    """Archive and delete up to `batch_size` rows of `queryset`.
+
+    Returns (deleted, archived). `queryset` is applied again to the DELETE,
+    so a row that stopped matching meanwhile is kept.
+    """
+    pks = list(queryset.order_by("pk").values_list("pk", flat=True)[:batch_size])
+    if not pks:
+        return 0, 0
+    batch = queryset.filter(pk__in=pks)
+    archived = archive.write(batch) if archive is not None else 0
+    deleted, _ = batch.delete()
+    return deleted, archived
@@ -9,6 +9,7 @@ class NotificationSerializer(serializers.ModelSerializer):
     target_repr = serializers.StringRelatedField(source="target", read_only=True)
     actor_avatar = serializers.SerializerMethodField()
     time_since = serializers.SerializerMethodField()
+    summary = serializers.SerializerMethodField()
 
     class Meta:
         model = Notification
@@ -18,12 +19,32 @@ class NotificationSerializer(serializers.ModelSerializer):
             "actor_username",
             "actor_avatar",
             "verb",
+            "summary",
+            "actor_count",
+            "sample_actors",
             "target_repr",
             "timestamp",
             "time_since",
             "is_read",
         ]
-        read_only_fields = ["recipient", "actor_username", "verb", "timestamp"]
+        read_only_fields = [
+            "recipient",
+            "actor_username",
+            "verb",
+            "actor_count",
+            "sample_actors",
+            "timestamp",
+        ]
+
+    @classmethod
+    def prepare_queryset(cls, queryset):
+        """Load what the fields read in a constant number of queries.
+
+        `actor` is joined. Generic targets are prefetched with one query per
+        content type, and the content types themselves come from Django's
+        per-process ContentType cache.
+        """
+        return queryset.select_related("actor").prefetch_related("target")
 
     def get_actor_avatar(self, obj):
         actor = getattr(obj, "actor", None)
@@ -42,3 +63,25 @@ class NotificationSerializer(serializers.ModelSerializer):
         if not obj.timestamp:
             return None
         return f"{timesince(obj.timestamp)} ago"
+
+    def get_summary(self, obj):
+        # e.g. "alice and 41 others liked your post"
+        others = obj.actor_count - 1
+        if others <= 0:
+            return f"{obj.actor.username} {obj.verb}"
+        noun = "others" if others > 1 else "other"
+        return f"{obj.actor.username} and {others} {noun} {obj.verb}"
+
+
+class NotificationBulkSerializer(serializers.Serializer):
+    """Selects notifications for bulk actions by id list and/or watermark."""
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, max_length=1000
+    )
+    before = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError("Provide `ids` and/or `before`.")
+        return attrs
@@ -0,0 +1,142 @@
+# notifications/stream.py
+"""Server-sent events for `/notifications/stream/`.
+
+Each event carries one notification, serialized like the REST list, with
+an `id:` of `<timestamp in µs>-<pk>`. Coalescing moves a notification's
+timestamp forward, so that id orders every delivery, including repeated
+deliveries of the same row. A client reconnecting with `Last-Event-ID` (or
+`?last_event_id=`, for the first connection) gets everything after it from
+the database before live events resume; if more than
+`NOTIFICATIONS_STREAM_REPLAY_LIMIT` are missing it gets a `resync` event
+and should reload the list instead.
+
+The stream subscribes before replaying, so nothing delivered during the
+replay is lost, and skips live events the replay already sent. It sends a
+comment line every `NOTIFICATIONS_STREAM_HEARTBEAT` seconds to keep proxies
+from timing out idle connections, and ends after
+`NOTIFICATIONS_STREAM_MAX_AGE` seconds; EventSource reconnects on its own.
+"""
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+from .broker import OVERFLOW, get_broker
+from .models import Notification
+from .serializers import NotificationSerializer
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+RETRY_MS = 3000
+# the largest value a database integer column holds
+MAX_PK = 2**63 - 1
+
+
+def heartbeat_interval() -> float:
+    return getattr(settings, "NOTIFICATIONS_STREAM_HEARTBEAT", 15)
+
+
+def max_age() -> float:
+    return getattr(settings, "NOTIFICATIONS_STREAM_MAX_AGE", 300)
+
+
+def replay_limit() -> int:
+    return getattr(settings, "NOTIFICATIONS_STREAM_REPLAY_LIMIT", 100)
+
+
+def event_id(notification) -> str:
+    return f"{(notification.timestamp - EPOCH) // MICROSECOND}-{notification.pk}"
+
+
+def parse_event_id(value):
+    """`(timestamp, pk)` for an event id; raises ValueError if malformed."""
+    micros, pk = (int(part) for part in value.split("-"))
+    if not 0 < pk <= MAX_PK:
+        raise ValueError(f"Event id out of range: {value!r}")
+    try:
+        return EPOCH + micros * MICROSECOND, pk
+    except OverflowError:
+        raise ValueError(f"Event id out of range: {value!r}") from None
+
+
+def _queryset():
+    return NotificationSerializer.prepare_queryset(Notification.objects.all())
+
+
+def _event(notification) -> dict:
+    return {
+        "id": event_id(notification),
+        "data": NotificationSerializer(notification).data,
+    }
+
+
+def publish(notifications):
+    """Push delivered notifications to their recipients' open streams."""
+    broker = get_broker()
+    recipients = broker.listening({n.recipient_id for n in notifications})
+    pks = [n.pk for n in notifications if n.recipient_id in recipients]
+    if not pks:
+        return
+    for notification in _queryset().filter(pk__in=pks):
+        broker.publish(notification.recipient_id, _event(notification))
+
+
+def replay(user_id, after, limit):
+    """Up to `limit` events after position `after`, oldest first, and
+    whether more were left out."""
+    timestamp, pk = after
+    notifications = list(
+        _queryset()
+        .filter(recipient_id=user_id)
+        .filter(Q(timestamp__gt=timestamp) | Q(timestamp=timestamp, pk__gt=pk))
+        .order_by("timestamp", "pk")[: limit + 1]
+    )
+    return [_event(n) for n in notifications[:limit]], len(notifications) > limit
+
+
+def format_event(event, name="notification") -> str:
+    data = json.dumps(event.get("data", {}), cls=DjangoJSONEncoder)
+    id_line = f"id: {event['id']}\n" if "id" in event else ""
+    return f"{id_line}event: {name}\ndata: {data}\n\n"
+
+
+async def events(user_id, last_position=None):
+    """The SSE body for one connection, as an async generator of str."""
+    broker = get_broker()
+    subscription = broker.subscribe(user_id)
+    replayed_to = None
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        if last_position is not None:
+            missed, truncated = await sync_to_async(replay)(
+                user_id, last_position, replay_limit()
+            )
+            for event in missed:
+                yield format_event(event)
+                replayed_to = parse_event_id(event["id"])
+            if truncated:
+                yield format_event({}, "resync")
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + max_age()
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                event = await asyncio.wait_for(
+                    subscription.get(), min(heartbeat_interval(), remaining)
+                )
+            except asyncio.TimeoutError:
+                yield ": heartbeat\n\n"
+                continue
+            if event is OVERFLOW:
+                # the client fell behind; it reconnects and replays
+                yield format_event({}, "overflow")
+                return
+            if replayed_to and parse_event_id(event["id"]) <= replayed_to:
+                continue
+            yield format_event(event)
+    finally:
+        broker.unsubscribe(subscription)
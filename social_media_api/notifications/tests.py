@@ -1,3 +1,506 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import json
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from pathlib import Path
+from io import StringIO
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from posts.models import Comment, Post
+from . import broker, counters, outbox, retention, stream
+from .models import Notification, NotificationActor, NotificationOutbox
+
+User = get_user_model()
+
+
+class OutboxTests(TestCase):
+    """Events write outbox rows; draining turns them into notifications."""
+
+    client: APIClient
+
+    def setUp(self):
+        self.client = APIClient()
+        self.author = User.objects.create(username="ivy")
+        self.fan = User.objects.create(username="jack")
+        self.post = Post.objects.create(author=self.author, title="t", content="...")
+        self.client.force_authenticate(self.fan)
+
+    def test_events_are_queued_not_delivered_inline(self):
+        self.client.post(f"/api/posts/{self.post.pk}/like/")
+        self.client.post(
+            "/api/comments/", {"post": self.post.pk, "content": "hi"}, format="json"
+        )
+        self.client.post(f"/api/accounts/follow/{self.author.pk}/")
+
+        self.assertEqual(NotificationOutbox.objects.count(), 3)
+        self.assertFalse(Notification.objects.exists())
+
+        self.assertEqual(outbox.drain(batch_size=2), 3)
+        self.assertFalse(NotificationOutbox.objects.exists())
+        self.assertEqual(
+            sorted(Notification.objects.values_list("verb", flat=True)),
+            ["commented on your post", "liked your post", "started following you"],
+        )
+        self.assertTrue(
+            all(n.recipient_id == self.author.pk for n in Notification.objects.all())
+        )
+
+    def test_own_post_is_not_queued(self):
+        self.client.force_authenticate(self.author)
+        self.client.post(f"/api/posts/{self.post.pk}/like/")
+        self.assertFalse(NotificationOutbox.objects.exists())
+
+    def test_management_command_drains_once(self):
+        outbox.enqueue(self.author.pk, self.fan.pk, "liked your post", self.post)
+        out = StringIO()
+        call_command("process_notification_outbox", once=True, stdout=out)
+        self.assertIn("delivered 1", out.getvalue())
+        self.assertEqual(Notification.objects.count(), 1)
+
+
+class CoalescingTests(TestCase):
+    """Bursts of (recipient, verb, target) events collapse into one row."""
+
+    def setUp(self):
+        self.author = User.objects.create(username="kate")
+        self.post = Post.objects.create(author=self.author, title="t", content="...")
+        self.fans = [User.objects.create(username=f"fan{i}") for i in range(5)]
+
+    def like(self, fan):
+        outbox.enqueue(self.author.pk, fan.pk, "liked your post", self.post)
+
+    def test_burst_in_one_batch_and_across_batches(self):
+        for fan in self.fans[:3]:
+            self.like(fan)
+        outbox.drain()
+        for fan in self.fans[3:]:
+            self.like(fan)
+        outbox.drain()
+
+        notification = Notification.objects.get()
+        self.assertEqual(notification.actor_count, 5)
+        self.assertEqual(notification.actor_id, self.fans[4].pk)
+        self.assertEqual(
+            [a["username"] for a in notification.sample_actors],
+            ["fan4", "fan3", "fan2"],
+        )
+
+        client = APIClient()
+        client.force_authenticate(self.author)
+        response = client.get("/notifications/notifications/")
+        summary = response.data["results"][0]["summary"]
+        self.assertEqual(summary, "fan4 and 4 others liked your post")
+
+    def test_read_notifications_are_not_reopened(self):
+        self.like(self.fans[0])
+        outbox.drain()
+        Notification.objects.update(is_read=True)
+        self.like(self.fans[1])
+        outbox.drain()
+        self.assertEqual(Notification.objects.count(), 2)
+
+    def test_same_actor_is_counted_once(self):
+        self.like(self.fans[0])
+        self.like(self.fans[0])
+        outbox.drain()
+        self.like(self.fans[0])
+        outbox.drain()
+        self.assertEqual(Notification.objects.get().actor_count, 1)
+
+    def test_returning_actor_beyond_the_sample_is_counted_once(self):
+        for fan in self.fans[:4]:
+            self.like(fan)
+            outbox.drain()
+        # fan0 has dropped out of the three sampled actors
+        self.like(self.fans[0])
+        outbox.drain()
+
+        notification = Notification.objects.get()
+        self.assertEqual(notification.actor_count, 4)
+        self.assertEqual(NotificationActor.objects.count(), 4)
+        self.assertEqual(
+            [a["username"] for a in notification.sample_actors],
+            ["fan0", "fan3", "fan2"],
+        )
+
+
+class UnreadCounterTests(TestCase):
+    """unread_count is served from the cache and kept in step with writes."""
+
+    client: APIClient
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create(username="liam")
+        self.client.force_authenticate(self.user)
+        self.posts = [
+            Post.objects.create(author=self.user, title=f"t{i}", content="...")
+            for i in range(3)
+        ]
+        fan = User.objects.create(username="mia")
+        for post in self.posts:
+            outbox.enqueue(self.user.pk, fan.pk, "liked your post", post)
+
+    def unread_count(self):
+        return self.client.get("/notifications/notifications/unread_count/").data[
+            "unread_count"
+        ]
+
+    def test_cold_counter_is_recomputed_then_served_from_cache(self):
+        outbox.drain()
+        self.assertEqual(self.unread_count(), 3)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.unread_count(), 3)
+
+    def test_delivery_and_mark_read_move_the_counter(self):
+        self.assertEqual(self.unread_count(), 0)  # warm the cache
+        with self.captureOnCommitCallbacks(execute=True):
+            outbox.drain()
+        self.assertEqual(self.unread_count(), 3)
+
+        notification = Notification.objects.first()
+        url = f"/notifications/notifications/{notification.pk}/mark_read/"
+        self.client.post(url)
+        self.client.post(url)  # already read: no double decrement
+        self.assertEqual(self.unread_count(), 2)
+
+        self.client.post("/notifications/notifications/mark_all_read/")
+        self.assertEqual(self.unread_count(), 0)
+        self.assertFalse(Notification.objects.filter(is_read=False).exists())
+
+
+class BulkActionTests(TestCase):
+    """Bulk mark-read / delete run as single statements."""
+
+    client: APIClient
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create(username="noah")
+        self.other = User.objects.create(username="olga")
+        self.client.force_authenticate(self.user)
+        post = Post.objects.create(author=self.user, title="t", content="...")
+        self.mine = [
+            Notification.objects.create(
+                recipient=self.user, actor=self.other, verb=f"v{i}", target=post
+            )
+            for i in range(4)
+        ]
+        self.theirs = Notification.objects.create(
+            recipient=self.other, actor=self.user, verb="v", target=post
+        )
+
+    def test_mark_read_by_ids_is_one_update(self):
+        ids = [self.mine[0].pk, self.mine[1].pk, self.theirs.pk]
+        with self.assertNumQueries(1):
+            response = self.client.post(
+                "/notifications/notifications/mark_read/", {"ids": ids}, format="json"
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Notification.objects.filter(is_read=True).count(), 2)
+        self.theirs.refresh_from_db()
+        self.assertFalse(self.theirs.is_read)
+
+    def test_mark_read_up_to_watermark(self):
+        Notification.objects.filter(pk=self.mine[3].pk).update(
+            timestamp=self.mine[3].timestamp + timedelta(hours=1)
+        )
+        self.client.post(
+            "/notifications/notifications/mark_read/",
+            {"before": self.mine[2].timestamp.isoformat()},
+            format="json",
+        )
+        self.assertEqual(
+            list(
+                Notification.objects.filter(recipient=self.user, is_read=False)
+                .values_list("pk", flat=True)
+            ),
+            [self.mine[3].pk],
+        )
+
+    def test_single_mark_read_and_bulk_delete(self):
+        url = f"/notifications/notifications/{self.mine[0].pk}/mark_read/"
+        with self.assertNumQueries(1):
+            self.client.post(url)
+        missing = f"/notifications/notifications/{self.theirs.pk}/mark_read/"
+        self.assertEqual(self.client.post(missing).status_code, 404)
+        malformed = "/notifications/notifications/abc/mark_read/"
+        self.assertEqual(self.client.post(malformed).status_code, 404)
+
+        response = self.client.post(
+            "/notifications/notifications/bulk_delete/",
+            {"ids": [n.pk for n in self.mine[:3]]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Notification.objects.filter(recipient=self.user).count(), 1)
+        self.assertEqual(
+            self.client.get("/notifications/notifications/unread_count/").data[
+                "unread_count"
+            ],
+            1,
+        )
+
+    def test_requires_a_selector(self):
+        response = self.client.post(
+            "/notifications/notifications/bulk_delete/", {}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Notification.objects.count(), 5)
+
+
+@override_settings(
+    NOTIFICATIONS_OUTBOX_WORKER="external",
+    NOTIFICATIONS_STREAM_HEARTBEAT=0.05,
+    NOTIFICATIONS_STREAM_MAX_AGE=2,
+)
+class NotificationStreamTests(TestCase):
+    """/notifications/stream/ pushes deliveries and resumes from an event id."""
+
+    def setUp(self):
+        self.user = User.objects.create(username="nora")
+        self.fan = User.objects.create(username="omar")
+        self.post = Post.objects.create(author=self.user, title="t", content="...")
+        token = Token.objects.create(user=self.user)
+        self.headers = {"Authorization": f"Token {token.key}"}
+
+    async def open_stream(self, **headers):
+        response = await self.async_client.get(
+            "/notifications/stream/", headers={**self.headers, **headers}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        content = response.streaming_content
+        self.assertEqual(await anext(content), b"retry: 3000\n\n")
+        return content
+
+    def deliver(self, verb="liked your post"):
+        with self.captureOnCommitCallbacks(execute=True):
+            outbox.enqueue(self.user.pk, self.fan.pk, verb, self.post)
+            outbox.drain()
+
+    def notify(self, count):
+        return [
+            Notification.objects.create(
+                recipient=self.user, actor=self.fan, verb=f"verb {i}", target=self.post
+            )
+            for i in range(count)
+        ]
+
+    async def test_delivered_notifications_are_pushed(self):
+        content = await self.open_stream()
+        await sync_to_async(self.deliver)()
+        event = (await anext(content)).decode()
+
+        notification = await Notification.objects.aget()
+        self.assertIn(f"id: {stream.event_id(notification)}\n", event)
+        self.assertIn("event: notification\n", event)
+        self.assertIn('"summary": "omar liked your post"', event)
+        self.assertEqual(await anext(content), b": heartbeat\n\n")
+
+    async def test_reconnect_replays_missed_notifications_in_order(self):
+        first, *missed = await sync_to_async(self.notify)(3)
+        content = await self.open_stream(**{"Last-Event-ID": stream.event_id(first)})
+        for notification in missed:
+            event = (await anext(content)).decode()
+            self.assertTrue(event.startswith(f"id: {stream.event_id(notification)}"))
+        self.assertEqual(await anext(content), b": heartbeat\n\n")
+
+    @override_settings(NOTIFICATIONS_STREAM_REPLAY_LIMIT=1)
+    async def test_replay_beyond_the_limit_asks_for_a_resync(self):
+        first, second, _ = await sync_to_async(self.notify)(3)
+        content = await self.open_stream(**{"Last-Event-ID": stream.event_id(first)})
+        self.assertIn(stream.event_id(second), (await anext(content)).decode())
+        self.assertIn(b"event: resync\n", await anext(content))
+
+    async def test_rejects_anonymous_and_malformed_ids(self):
+        response = await self.async_client.get("/notifications/stream/")
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.get(
+            "/notifications/stream/",
+            headers={**self.headers, "Last-Event-ID": "nonsense"},
+        )
+        self.assertEqual(response.status_code, 400)
+        for out_of_range in ("99999999999999999999-1", "1-99999999999999999999"):
+            response = await self.async_client.get(
+                "/notifications/stream/",
+                headers={**self.headers, "Last-Event-ID": out_of_range},
+            )
+            self.assertEqual(response.status_code, 400)
+
+    @override_settings(NOTIFICATIONS_STREAM_QUEUE_SIZE=2)
+    async def test_slow_subscriber_is_cut_off_instead_of_buffering(self):
+        local = broker.InProcessBroker()
+        subscription = local.subscribe(self.user.pk)
+        for i in range(3):
+            local.publish(self.user.pk, {"id": f"1-{i}"})
+        await asyncio.sleep(0)  # let the hand-offs run
+
+        self.assertIs(await subscription.get(), broker.OVERFLOW)
+        local.unsubscribe(subscription)
+        self.assertEqual(local.listening({self.user.pk}), set())
+
+
+class AsyncNotificationListTests(TestCase):
+    """/notifications/async/notifications/ pages like the sync list."""
+
+    client: APIClient
+
+    def setUp(self):
+        self.user = User.objects.create(username="pia")
+        fan = User.objects.create(username="quinn")
+        for i in range(12):
+            post = Post.objects.create(author=self.user, title=f"t{i}", content="...")
+            Notification.objects.create(
+                recipient=self.user, actor=fan, verb="liked your post", target=post
+            )
+        Notification.objects.create(
+            recipient=self.user, actor=fan, verb="started following you", target=fan
+        )
+        token = Token.objects.create(user=self.user)
+        self.headers = {"Authorization": f"Token {token.key}"}
+        self.client = APIClient(headers=self.headers)
+
+    async def test_pages_match_the_sync_list(self):
+        for page in (1, 2):
+            expected = await sync_to_async(self.client.get)(
+                "/notifications/notifications/", {"page": page}
+            )
+            response = await self.async_client.get(
+                "/notifications/async/notifications/",
+                {"page": page},
+                headers=self.headers,
+            )
+            self.assertEqual(response.status_code, 200)
+            # identical bodies, pagination links aside
+            self.assertEqual(
+                response.content.decode().replace("/async/", "/"),
+                expected.content.decode(),
+            )
+        self.assertEqual(response.json()["count"], 13)
+
+        response = await self.async_client.get(
+            "/notifications/async/notifications/", {"page": 9}, headers=self.headers
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class NotificationListQueryTests(TestCase):
+    """Listing costs a fixed number of queries, however many rows it shows."""
+
+    client: APIClient
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create(username="rae")
+        self.client.force_authenticate(self.user)
+        self.post = Post.objects.create(author=self.user, title="t", content="...")
+        self.actors = 0
+
+    def notify(self, count):
+        # a different actor per row, and targets of three content types
+        for _ in range(count):
+            actor = User.objects.create(username=f"actor{self.actors}")
+            self.actors += 1
+            comment = Comment.objects.create(post=self.post, author=actor, content="!")
+            for verb, target in [
+                ("liked your post", self.post),
+                ("commented on your post", comment),
+                ("started following you", actor),
+            ]:
+                Notification.objects.create(
+                    recipient=self.user, actor=actor, verb=verb, target=target
+                )
+
+    def test_unread_and_list_use_constant_queries(self):
+        self.notify(2)
+        self.client.get("/notifications/notifications/")  # warm ContentType cache
+        self.notify(20)
+        # notifications joined with actors, then one query per target type
+        with self.assertNumQueries(4):
+            response = self.client.get("/notifications/notifications/unread/")
+        self.assertEqual(len(response.data), 66)
+        self.assertEqual(
+            {n["target_repr"] for n in response.data[-3:]},
+            {str(self.post), "actor0", str(Comment.objects.earliest("pk"))},
+        )
+        # plus the page COUNT
+        with self.assertNumQueries(5):
+            self.client.get("/notifications/notifications/")
+
+
+class RetentionTests(TestCase):
+    """prune_notifications applies the age and per-user rules in batches."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="sam")
+        self.fan = User.objects.create(username="tess")
+        self.now = datetime(2026, 6, 15, tzinfo=dt_timezone.utc)
+
+    def notify(self, days_ago, is_read):
+        notification = Notification.objects.create(
+            recipient=self.user, actor=self.fan, verb="v", target=self.fan
+        )
+        Notification.objects.filter(pk=notification.pk).update(
+            timestamp=self.now - timedelta(days=days_ago), is_read=is_read
+        )
+        return notification.pk
+
+    def test_old_read_rows_are_archived_then_deleted(self):
+        march = [self.notify(100, True), self.notify(101, True)]
+        february = self.notify(130, True)
+        kept = [self.notify(100, False), self.notify(5, True)]
+
+        with tempfile.TemporaryDirectory() as directory:
+            result = retention.prune(
+                days=90, per_user=0, batch_size=2, archive_dir=directory, now=self.now
+            )
+            archived = {}
+            for path in Path(directory).iterdir():
+                with gzip.open(path, "rt") as lines:
+                    archived[path.name] = [json.loads(line) for line in lines]
+
+        self.assertEqual((result.expired, result.archived), (3, 3))
+        self.assertTrue(result.finished)
+        self.assertCountEqual(Notification.objects.values_list("pk", flat=True), kept)
+        self.assertEqual(
+            sorted(row["id"] for row in archived["notifications-2026-03.jsonl.gz"]),
+            march,
+        )
+        [row] = archived["notifications-2026-02.jsonl.gz"]
+        self.assertEqual(row["id"], february)
+        self.assertEqual(row["target_content_type"], "accounts.customuser")
+
+    def test_cap_keeps_the_newest_and_invalidates_the_counter(self):
+        pks = [self.notify(days, is_read=False) for days in (4, 3, 2, 1)]
+        self.assertEqual(counters.unread_count(self.user.pk), 4)
+
+        result = retention.prune(days=90, per_user=2, batch_size=1, now=self.now)
+
+        self.assertEqual(result.capped, 2)
+        self.assertCountEqual(
+            Notification.objects.values_list("pk", flat=True), pks[2:]
+        )
+        self.assertEqual(counters.unread_count(self.user.pk), 2)
+
+    def test_command_stops_when_the_time_budget_is_spent(self):
+        self.notify(400, True)
+        out = StringIO()
+        call_command("prune_notifications", time_budget=0, stdout=out)
+        self.assertIn("run again to continue", out.getvalue())
+        self.assertEqual(Notification.objects.count(), 1)
+
+        call_command("prune_notifications", stdout=out)
+        self.assertIn("deleted 1 expired", out.getvalue())
+        self.assertFalse(Notification.objects.exists())
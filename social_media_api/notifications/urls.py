@@ -1,8 +1,16 @@
 # notifications/urls.py
+from django.urls import path
 from rest_framework.routers import DefaultRouter
-from .views import NotificationViewSet
+from .views import AsyncNotificationListView, NotificationViewSet, notification_stream
 
 router = DefaultRouter()
 router.register("notifications", NotificationViewSet, basename="notifications")
 
-urlpatterns = router.urls
+urlpatterns = [
+    path("stream/", notification_stream, name="notification-stream"),
+    path(
+        "async/notifications/",
+        AsyncNotificationListView.as_view(),
+        name="async-notification-list",
+    ),
+] + router.urls
@@ -1,17 +1,33 @@
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
-from rest_framework import viewsets, permissions, status
+from django.views.decorators.http import require_GET
+from rest_framework import exceptions, viewsets, permissions, status
+from rest_framework.authentication import SessionAuthentication
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from accounts.authentication import CachedTokenAuthentication
+from posts.pagination import AsyncPageNumberPagination
+from social_media_api.async_views import AsyncAPIView
+from . import counters, stream
 from .models import Notification
-from .serializers import NotificationSerializer
+from .serializers import NotificationSerializer, NotificationBulkSerializer
 from django.db.models import QuerySet
 
 
 class NotificationViewSet(viewsets.ModelViewSet):
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # detail actions filter on the raw pk; anything else is a 404, not a 500
+    lookup_value_regex = r"\d+"
 
     def get_queryset(self) -> QuerySet[Notification]:
+        return NotificationSerializer.prepare_queryset(self._owned())
+
+    def _owned(self) -> QuerySet[Notification]:
         # Order unread notifications first, then by newest timestamp
         # `is_read` is False for unread; ordering ascending puts unread before read.
         return Notification.objects.filter(recipient=self.request.user).order_by(
@@ -28,13 +44,127 @@ class NotificationViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=["get"])
     def unread_count(self, request):
-        """Return the current user's unread notification count."""
-        count = self.get_queryset().filter(is_read=False).count()
-        return Response({"unread_count": count})
+        """Return the current user's unread notification count (cached)."""
+        return Response({"unread_count": counters.unread_count(request.user.pk)})
 
     @action(detail=True, methods=["post"])
     def mark_read(self, request, pk=None):
-        notification = self.get_object()
-        notification.is_read = True
-        notification.save()
+        # a single narrow UPDATE; only fall back to a lookup when nothing
+        # changed, to tell "already read" from "not yours / missing"
+        updated = self._owned().filter(pk=pk, is_read=False).update(is_read=True)
+        if updated:
+            counters.decr(request.user.pk)
+        elif not self._owned().filter(pk=pk).exists():
+            raise NotFound()
         return Response({"detail": "Notification marked as read."})
+
+    @action(detail=False, methods=["post"], url_path="mark_read")
+    def bulk_mark_read(self, request):
+        """Mark read by `ids` and/or everything up to a `before` timestamp."""
+        queryset = self._bulk_queryset(request).filter(is_read=False)
+        updated = queryset.update(is_read=True)
+        if updated:
+            counters.decr(request.user.pk, updated)
+        return Response({"detail": f"{updated} notification(s) marked as read."})
+
+    @action(detail=False, methods=["post"])
+    def bulk_delete(self, request):
+        """Delete by `ids` and/or everything up to a `before` timestamp."""
+        deleted, _ = self._bulk_queryset(request).delete()
+        # the DELETE does not report how many were unread; rebuild lazily
+        counters.invalidate(request.user.pk)
+        return Response({"detail": f"{deleted} notification(s) deleted."})
+
+    def _bulk_queryset(self, request) -> QuerySet[Notification]:
+        params = NotificationBulkSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        queryset = self._owned()
+        if "ids" in params.validated_data:
+            queryset = queryset.filter(pk__in=params.validated_data["ids"])
+        if "before" in params.validated_data:
+            queryset = queryset.filter(timestamp__lte=params.validated_data["before"])
+        return queryset
+
+    @action(detail=False, methods=["post"])
+    def mark_all_read(self, request):
+        """Mark every unread notification read and zero the cached counter."""
+        updated = self._owned().filter(is_read=False).update(is_read=True)
+        counters.reset(request.user.pk)
+        return Response({"detail": f"{updated} notification(s) marked as read."})
+
+    def perform_update(self, serializer):
+        was_read = serializer.instance.is_read
+        notification = serializer.save()
+        if notification.is_read != was_read:
+            counters.incr(self.request.user.pk, -1 if notification.is_read else 1)
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        if not instance.is_read:
+            counters.decr(self.request.user.pk)
+
+
+class AsyncNotificationListView(AsyncAPIView):
+    """`GET /notifications/notifications/` as an async view."""
+
+    serializer_class = NotificationSerializer
+    pagination_class = AsyncPageNumberPagination
+
+    async def aget(self, request):
+        queryset = Notification.objects.filter(
+            recipient_id=request.user.pk
+        ).order_by("is_read", "-timestamp")
+        return await self.alist(
+            request, NotificationSerializer.prepare_queryset(queryset)
+        )
+
+
+STREAM_AUTHENTICATION_CLASSES = [
+    JWTStatelessUserAuthentication,
+    CachedTokenAuthentication,
+    SessionAuthentication,
+]
+
+
+def _stream_user(request):
+    """Authenticate a plain Django request the way the DRF views do."""
+    drf_request = Request(
+        request, authenticators=[cls() for cls in STREAM_AUTHENTICATION_CLASSES]
+    )
+    try:
+        user = drf_request.user
+    except exceptions.AuthenticationFailed:
+        return None
+    return user if user.is_authenticated else None
+
+
+@require_GET
+async def notification_stream(request):
+    """Push the user's new notifications as server-sent events.
+
+    An async view, so under ASGI an open stream costs a coroutine rather
+    than a worker thread. See `notifications/stream.py` for the protocol.
+    """
+    user = await sync_to_async(_stream_user)(request)
+    if user is None:
+        return JsonResponse(
+            {"detail": "Authentication credentials were not provided."}, status=401
+        )
+
+    last_event_id = request.headers.get("Last-Event-ID") or request.GET.get(
+        "last_event_id"
+    )
+    last_position = None
+    if last_event_id:
+        try:
+            last_position = stream.parse_event_id(last_event_id)
+        except ValueError:
+            return JsonResponse({"detail": "Malformed Last-Event-ID."}, status=400)
+
+    response = StreamingHttpResponse(
+        stream.events(user.pk, last_position), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    # stop nginx from buffering the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,76 @@
+# posts/cache.py
+"""Cache of serialized post detail representations.
+
+Entries are keyed by post id and a per-post version number. Writes to a
+post, its comments or its likes bump the version (see `posts/signals.py`),
+which orphans the old entry instead of racing to delete it; orphans age out
+after `POST_DETAIL_CACHE_TTL` seconds.
+
+A miss is rebuilt by a single request per post and version: the first
+caller takes a short lock with `cache.add()` and the others poll for its
+result, so a hot post expiring causes one rebuild rather than a stampede.
+
+The cached body is the same for every viewer; per-user fields such as
+`liked_by_me` are filled in by the caller.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+LOCK_TIMEOUT = 10  # seconds; bounds how long a crashed builder blocks others
+POLL_INTERVAL = 0.05
+POLL_ATTEMPTS = 20
+
+
+def _ttl():
+    return getattr(settings, "POST_DETAIL_CACHE_TTL", 300)
+
+
+def _version_key(post_id):
+    return f"posts:detail:version:{post_id}"
+
+
+def version(post_id) -> int:
+    key = _version_key(post_id)
+    current = cache.get(key)
+    if current is None:
+        # a clock-based start can never collide with a version that was
+        # evicted together with its key
+        cache.add(key, time.time_ns(), None)
+        current = cache.get(key)
+    return current
+
+
+def invalidate(post_id):
+    try:
+        cache.incr(_version_key(post_id))
+    except ValueError:
+        # no version yet: the next read starts a fresh one
+        pass
+
+
+def get_or_build(post_id, build):
+    """Return the cached entry for `post_id`, building it at most once."""
+    current = version(post_id)
+    key = f"posts:detail:{post_id}:{current}"
+    entry = cache.get(key)
+    if entry is not None:
+        return entry
+
+    lock = f"{key}:lock"
+    if cache.add(lock, 1, LOCK_TIMEOUT):
+        try:
+            entry = build()
+            cache.set(key, entry, _ttl())
+            return entry
+        finally:
+            cache.delete(lock)
+
+    for _ in range(POLL_ATTEMPTS):
+        time.sleep(POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    # the builder is slow or gone; serve this request without caching
+    return build()
@@ -0,0 +1,172 @@
+# posts/conditional.py
+"""HTTP conditional requests (ETag / Last-Modified) for DRF views.
+
+Validators are computed from the rows a response is built from, after the
+page (or object) query but before serialization, so a revalidation that
+matches is answered with 304 without rendering anything. Writes honour
+`If-Match`, locking the row while the precondition is checked, which gives
+clients optimistic concurrency.
+
+A view describes what its representation depends on with `version_fields`
+(attributes of each object, annotations included) and `version_related`
+(prefetched to-many relations whose items carry `pk` / `updated_at`).
+Last-Modified is only emitted for single objects, and only when
+`use_last_modified` says `updated_at` covers every field the serializer
+shows. Lists rely on the ETag alone: deleting a row from a page leaves its
+newest `updated_at` unchanged, so a date would let a stale page revalidate.
+"""
+import hashlib
+from contextlib import nullcontext
+
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+
+class ConditionalResponseMixin:
+    version_fields = ("pk", "updated_at")
+    version_related = ()
+    use_last_modified = False
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if getattr(self, "_lock_object", False):
+            queryset = queryset.select_for_update(of=("self",))
+        return queryset
+
+    # --- validators ----------------------------------------------------------
+
+    def get_object_version(self, obj):
+        version = [getattr(obj, field, None) for field in self.version_fields]
+        for name in self.version_related:
+            items = _prefetched(obj, name)
+            if items is not None:
+                version.append([(item.pk, item.updated_at) for item in items])
+        return version
+
+    def get_validators(self, objects, path, many=False):
+        digest = hashlib.sha1(path.encode())
+        for obj in objects:
+            digest.update(repr(self.get_object_version(obj)).encode())
+        etag = quote_etag(digest.hexdigest())
+
+        last_modified = None
+        if self.use_last_modified and not many:
+            (obj,) = objects
+            last_modified = int(obj.updated_at.timestamp())
+        return etag, last_modified
+
+    def conditional_response(self, request, objects, path, many=False):
+        """(304/412 response or None, etag, last_modified) for `objects`."""
+        etag, last_modified = self.get_validators(objects, path, many)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is not None:
+            self.set_validators(response, etag, last_modified)
+        return response, etag, last_modified
+
+    @staticmethod
+    def set_validators(response, etag, last_modified):
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    # --- reads ---------------------------------------------------------------
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        objects = page if page is not None else list(queryset)
+
+        conditional, etag, last_modified = self.conditional_response(
+            request, objects, request.get_full_path(), many=True
+        )
+        if conditional is not None:
+            return conditional
+
+        serializer = self.get_serializer(objects, many=True)
+        if page is not None:
+            response = self.get_paginated_response(serializer.data)
+        else:
+            response = Response(serializer.data)
+        return self.set_validators(response, etag, last_modified)
+
+    async def alist(self, request, queryset):
+        """`list()` for `AsyncAPIView`s: the page query is awaited."""
+        page = await self.paginator.apaginate_queryset(queryset, request, view=self)
+        conditional, etag, last_modified = self.conditional_response(
+            request, page, request.get_full_path(), many=True
+        )
+        if conditional is not None:
+            return conditional
+
+        serializer = self.get_serializer(page, many=True)
+        response = self.paginator.get_paginated_response(serializer.data)
+        return self.set_validators(response, etag, last_modified)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        conditional, etag, last_modified = self.conditional_response(
+            request, [instance], request.path
+        )
+        if conditional is not None:
+            return conditional
+
+        serializer = self.get_serializer(instance)
+        return self.set_validators(Response(serializer.data), etag, last_modified)
+
+    # --- writes --------------------------------------------------------------
+
+    def update(self, request, *args, **kwargs):
+        partial = kwargs.pop("partial", False)
+        with self._locked_if_conditional(request):
+            instance = self.get_object()
+            conditional, _, _ = self.conditional_response(
+                request, [instance], request.path
+            )
+            if conditional is not None:
+                return conditional
+
+            serializer = self.get_serializer(
+                instance, data=request.data, partial=partial
+            )
+            serializer.is_valid(raise_exception=True)
+            self.perform_update(serializer)
+
+        # validators first: they read the prefetched relations DRF drops below
+        etag, last_modified = self.get_validators([instance], request.path)
+        if getattr(instance, "_prefetched_objects_cache", None):
+            instance._prefetched_objects_cache = {}
+        return self.set_validators(Response(serializer.data), etag, last_modified)
+
+    def destroy(self, request, *args, **kwargs):
+        with self._locked_if_conditional(request):
+            instance = self.get_object()
+            conditional, _, _ = self.conditional_response(
+                request, [instance], request.path
+            )
+            if conditional is not None:
+                return conditional
+            self.perform_destroy(instance)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def _locked_if_conditional(self, request):
+        if not (
+            "HTTP_IF_MATCH" in request.META
+            or "HTTP_IF_UNMODIFIED_SINCE" in request.META
+        ):
+            return nullcontext()
+        self._lock_object = True
+        return transaction.atomic()
+
+
+def _prefetched(obj, name):
+    """Items of a prefetched relation, or None if it was not loaded."""
+    cache = getattr(obj, "_prefetched_objects_cache", {})
+    if name in cache:
+        return cache[name]
+    return obj.__dict__.get(name)  # Prefetch(..., to_attr=name)
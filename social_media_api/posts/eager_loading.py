@@ -0,0 +1,92 @@
+# posts/eager_loading.py
+"""Derive `select_related` / `prefetch_related` from a serializer's fields.
+
+Walking the serializer's field tree keeps the queryset in step with what the
+serializer will actually touch, so adding a nested or related field to a
+serializer never silently reintroduces an N+1 query pattern.
+
+Fields that are not plain model relations (annotations, sliced prefetches)
+can be supplied by the serializer through a `prepare_queryset` classmethod.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch, QuerySet
+from rest_framework import serializers
+
+
+def eager_load(queryset: QuerySet, serializer_class) -> QuerySet:
+    """Return `queryset` with the joins/prefetches `serializer_class` needs."""
+    select, prefetch = _collect(queryset.model, serializer_class(), prefix="")
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    prepare = getattr(serializer_class, "prepare_queryset", None)
+    if prepare is not None:
+        queryset = prepare(queryset)
+    return queryset
+
+
+def _collect(model, serializer, prefix):
+    select, prefetch = [], []
+
+    for field in serializer.fields.values():
+        if field.write_only or field.source == "*":
+            continue
+
+        # follow single-valued relations along the dotted source
+        path, current = [], model
+        relation = None
+        for attr in field.source_attrs:
+            try:
+                relation = current._meta.get_field(attr)
+            except FieldDoesNotExist:
+                relation = None
+                break
+            if not relation.is_relation:
+                relation = None
+                break
+            path.append(attr)
+            if relation.many_to_many or relation.one_to_many:
+                break
+            current = relation.related_model
+            relation = None
+
+        if not path:
+            continue
+        lookup = prefix + "__".join(path)
+
+        if relation is not None:
+            # the chain ends in a to-many relation: prefetch it, recursing
+            # into nested serializers so their own relations are batched too
+            child = getattr(field, "child", None)
+            if isinstance(child, serializers.BaseSerializer):
+                related_qs = eager_load(
+                    relation.related_model._default_manager.all(), type(child)
+                )
+                prefetch.append(Prefetch(lookup, queryset=related_qs))
+            else:
+                prefetch.append(lookup)
+            continue
+
+        if isinstance(field, serializers.BaseSerializer):
+            # nested single object: join it and recurse into its fields
+            select.append(lookup)
+            nested_select, nested_prefetch = _collect(
+                current, field, prefix=lookup + "__"
+            )
+            select += nested_select
+            prefetch += nested_prefetch
+            continue
+
+        if (
+            isinstance(field, serializers.RelatedField)
+            and field.use_pk_only_optimization()
+            and len(path) == 1
+            and len(field.source_attrs) == 1
+        ):
+            # primary key fields read `<fk>_id` straight off the row
+            continue
+
+        select.append(lookup)
+
+    return select, prefetch
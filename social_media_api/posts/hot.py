@@ -0,0 +1,90 @@
+# posts/hot.py
+"""Hot score for the trending posts listing.
+
+    hot_score = log10(max(engagement, 1)) + (created_at - EPOCH) / scale
+    engagement = LIKE_WEIGHT * likes + COMMENT_WEIGHT * comments
+
+A post published `POST_HOT_TIME_SCALE` later needs ten times less
+engagement to rank the same, so newer posts win without any score ever
+being decayed: the value only changes when a post is liked or commented
+on. Those writes adjust the log term in the same `UPDATE` that bumps the
+counters (`counter_update()`); `manage.py recompute_hot_scores` rebuilds
+every score in bulk, e.g. after changing the weights or the time scale.
+"""
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Greatest, Log
+from django.utils import timezone
+
+EPOCH = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+LIKE_WEIGHT = 1
+COMMENT_WEIGHT = 2
+
+
+def time_scale() -> timedelta:
+    return getattr(settings, "POST_HOT_TIME_SCALE", timedelta(hours=12))
+
+
+def score(like_count, comment_count, created_at) -> float:
+    engagement = LIKE_WEIGHT * like_count + COMMENT_WEIGHT * comment_count
+    return math.log10(max(engagement, 1)) + (created_at - EPOCH) / time_scale()
+
+
+def initial_score() -> float:
+    """Default for new posts: no engagement, published now."""
+    return score(0, 0, timezone.now())
+
+
+def _log_engagement(likes, comments):
+    engagement = LIKE_WEIGHT * likes + COMMENT_WEIGHT * comments
+    return Log(Value(10.0), Greatest(engagement, 1), output_field=FloatField())
+
+
+def counter_update(likes=0, comments=0) -> dict:
+    """`update()` kwargs that move the counters and the hot score together.
+
+    SET expressions all read the pre-update row, so the new log term is
+    computed from the old counters plus the deltas.
+    """
+    fields = {}
+    if likes:
+        fields["like_count"] = F("like_count") + likes
+    if comments:
+        fields["comment_count"] = F("comment_count") + comments
+    fields["hot_score"] = (
+        F("hot_score")
+        - _log_engagement(F("like_count"), F("comment_count"))
+        + _log_engagement(F("like_count") + likes, F("comment_count") + comments)
+    )
+    return fields
+
+
+def recompute(batch_size=1000) -> int:
+    """Rewrite every post's hot score from its counters, in pk batches.
+
+    A like landing between a batch's read and its write leaves that post
+    one event behind until the next run; counters are not touched.
+    """
+    from .models import Post
+
+    last_pk, updated = 0, 0
+    while True:
+        batch = list(
+            Post.objects.filter(pk__gt=last_pk)
+            .order_by("pk")
+            .only("pk", "like_count", "comment_count", "created_at", "hot_score")[
+                :batch_size
+            ]
+        )
+        if not batch:
+            return updated
+        last_pk = batch[-1].pk
+        for post in batch:
+            post.hot_score = score(
+                post.like_count, post.comment_count, post.created_at
+            )
+        Post.objects.bulk_update(batch, ["hot_score"])
+        updated += len(batch)
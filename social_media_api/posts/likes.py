@@ -0,0 +1,53 @@
+# posts/likes.py
+"""Idempotent like/unlike writes.
+
+Both operations reference the post only through its id: the `Like` row is
+written first and the post row is touched by a single guarded `F()` update,
+so no `Post` instance is loaded. Each returns `(changed, like_count)` and
+raises `Post.DoesNotExist` for unknown posts.
+"""
+from django.db import IntegrityError, transaction
+
+from notifications import outbox
+
+from . import hot
+from .models import Like, Post
+
+
+def _like_count(post_id):
+    return Post.objects.filter(pk=post_id).values_list("like_count", flat=True).get()
+
+
+def like(user, post_id):
+    with transaction.atomic():
+        try:
+            # the savepoint keeps a duplicate from aborting the transaction
+            with transaction.atomic():
+                Like.objects.create(user_id=user.pk, post_id=post_id)
+        except IntegrityError:
+            return False, _like_count(post_id)
+
+        bumped = Post.objects.filter(pk=post_id).update(**hot.counter_update(likes=1))
+        if not bumped:
+            # the FK check is deferred to commit; roll the insert back now
+            raise Post.DoesNotExist
+
+        author_id, like_count = (
+            Post.objects.filter(pk=post_id)
+            .values_list("author_id", "like_count")
+            .get()
+        )
+        # notify only for a genuinely new like
+        if author_id != user.pk:
+            outbox.enqueue(author_id, user.pk, "liked your post", Post(pk=post_id))
+    return True, like_count
+
+
+def unlike(user, post_id):
+    with transaction.atomic():
+        deleted, _ = Like.objects.filter(user_id=user.pk, post_id=post_id).delete()
+        if deleted:
+            Post.objects.filter(pk=post_id, like_count__gt=0).update(
+                **hot.counter_update(likes=-1)
+            )
+        return bool(deleted), _like_count(post_id)
@@ -0,0 +1,77 @@
+# posts/management/commands/benchmark_read_path.py
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.authtoken.models import Token
+
+from posts.models import Post
+from social_media_api import benchmark
+
+# endpoint: (sync view, async view)
+ENDPOINTS = {
+    "feed": ("/api/feed/", "/api/async/feed/"),
+    "posts": ("/api/posts/", "/api/async/posts/"),
+    "post": ("/api/posts/{post_id}/", "/api/async/posts/{post_id}/"),
+    "notifications": (
+        "/notifications/notifications/",
+        "/notifications/async/notifications/",
+    ),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Load the read endpoints in-process and compare latency and "
+        "throughput of the sync views under WSGI and ASGI with the async "
+        "views under ASGI."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", required=True, help="username to request as")
+        parser.add_argument(
+            "--endpoint", choices=ENDPOINTS, action="append", dest="endpoints"
+        )
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=32)
+        parser.add_argument(
+            "--threads", type=int, default=8, help="WSGI worker threads"
+        )
+        parser.add_argument(
+            "--db-latency",
+            type=float,
+            default=0,
+            help="milliseconds added to every query, to mimic a remote database",
+        )
+        parser.add_argument("--host", default="localhost")
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(username=options["user"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user named {options['user']!r}.")
+        token, _ = Token.objects.get_or_create(user=user)
+        post_id = Post.objects.order_by("-id").values_list("pk", flat=True).first()
+
+        load = {
+            "headers": {"Authorization": f"Token {token.key}"},
+            "requests": options["requests"],
+            "concurrency": options["concurrency"],
+            "host": options["host"],
+        }
+        with benchmark.simulated_db_latency(options["db_latency"] / 1000):
+            for name in options["endpoints"] or ENDPOINTS:
+                if name == "post" and post_id is None:
+                    self.stdout.write("post: skipped, there are no posts")
+                    continue
+                sync_url, async_url = (
+                    url.format(post_id=post_id) for url in ENDPOINTS[name]
+                )
+                self.stdout.write(f"{name}:")
+                results = [
+                    benchmark.run_wsgi(
+                        [sync_url], threads=options["threads"], **load
+                    ),
+                    benchmark.run_asgi([sync_url], label="asgi, sync view", **load),
+                    benchmark.run_asgi([async_url], label="asgi, async view", **load),
+                ]
+                for result in results:
+                    self.stdout.write(f"  {result.summary()}")
@@ -0,0 +1,18 @@
+# posts/management/commands/recompute_hot_scores.py
+from django.core.management.base import BaseCommand
+
+from posts import hot
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every post's trending hot score from its like and comment "
+        "counters, e.g. after changing POST_HOT_TIME_SCALE or the weights."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        updated = hot.recompute(options["batch_size"])
+        self.stdout.write(f"recomputed {updated} post(s)")
@@ -0,0 +1,80 @@
+# posts/management/commands/reconcile_counters.py
+from django.core.management.base import BaseCommand
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from accounts.models import CustomUser, Follow
+from posts.models import Comment, Like, Post
+
+
+def count_of(model, column):
+    """Correlated `COUNT(*)` of `model` rows whose `column` is the outer pk."""
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{column: OuterRef("pk")})
+            .values(column)
+            .annotate(total=Count("pk"))
+            .values("total")
+        ),
+        0,
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute denormalized like/comment/follower counters and fix any "
+        "rows that drifted, walking each table in primary-key batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+
+        fixed = self.reconcile(
+            Post,
+            {
+                "like_count": count_of(Like, "post"),
+                "comment_count": count_of(Comment, "post"),
+            },
+            batch_size,
+        )
+        self.stdout.write(f"posts: fixed {fixed} row(s)")
+
+        fixed = self.reconcile(
+            CustomUser,
+            {
+                "follower_count": count_of(Follow, "followee"),
+                "following_count": count_of(Follow, "follower"),
+            },
+            batch_size,
+        )
+        self.stdout.write(f"users: fixed {fixed} row(s)")
+
+    def reconcile(self, model, counters, batch_size):
+        fields = list(counters)
+        actual = {f"actual_{field}": expr for field, expr in counters.items()}
+        last_pk, fixed = 0, 0
+
+        while True:
+            batch = list(
+                model.objects.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .only("pk", *fields)
+                .annotate(**actual)[:batch_size]
+            )
+            if not batch:
+                return fixed
+            last_pk = batch[-1].pk
+
+            drifted = [
+                obj.pk
+                for obj in batch
+                if any(getattr(obj, f) != getattr(obj, f"actual_{f}") for f in fields)
+            ]
+            if drifted:
+                # recompute in the UPDATE itself so increments that landed
+                # since the batch was read are not overwritten
+                model.objects.filter(pk__in=drifted).update(**counters)
+                fixed += len(drifted)
@@ -0,0 +1,61 @@
+# Generated by Django 6.0 on 2026-10-17 09:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+BACKFILL_LIMIT = 200
+
+
+def backfill_timelines(apps, schema_editor):
+    """Materialize timelines for follow relationships that already exist."""
+    CustomUser = apps.get_model("accounts", "CustomUser")
+    Post = apps.get_model("posts", "Post")
+    TimelineEntry = apps.get_model("posts", "TimelineEntry")
+
+    edges = CustomUser.following.through.objects.values_list(
+        "from_customuser_id", "to_customuser_id"
+    )
+    for follower_id, followee_id in edges.iterator():
+        recent = Post.objects.filter(author_id=followee_id).order_by("-created_at")
+        TimelineEntry.objects.bulk_create(
+            [
+                TimelineEntry(
+                    recipient_id=follower_id,
+                    post_id=post_id,
+                    author_id=followee_id,
+                    created_at=created_at,
+                )
+                for post_id, created_at in recent.values_list("pk", "created_at")[
+                    :BACKFILL_LIMIT
+                ]
+            ],
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_customuser_fan_out_on_read'),
+        ('posts', '0002_like'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='posts.post')),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['recipient', '-created_at'], name='timeline_recipient_idx'), models.Index(fields=['recipient', 'author'], name='timeline_author_idx')],
+                'constraints': [models.UniqueConstraint(fields=('recipient', 'post'), name='unique_timeline_entry')],
+            },
+        ),
+        migrations.RunPython(backfill_timelines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 6.0 on 2026-10-17 16:10
+
+from django.db import migrations
+
+
+def install(apps, schema_editor):
+    from posts import search
+
+    connection = schema_editor.connection
+    search.get_backend(connection.alias).install(connection)
+
+
+def uninstall(apps, schema_editor):
+    from posts import search
+
+    connection = schema_editor.connection
+    search.get_backend(connection.alias).uninstall(connection)
+
+
+class Migration(migrations.Migration):
+    """Search index for posts; `posts.search` owns the SQL for each backend.
+
+    On SQLite, later migrations that rebuild `posts_post` drop its triggers;
+    a `post_migrate` handler reinstalls them (see `posts/signals.py`).
+    """
+
+    dependencies = [
+        ('posts', '0005_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 6.0 on 2026-10-17 16:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def index_existing_posts(apps, schema_editor):
+    """Link existing posts to their tags and mentions (no notifications)."""
+    from posts.tags import extract_hashtags, extract_mentions
+
+    Post = apps.get_model("posts", "Post")
+    Hashtag = apps.get_model("posts", "Hashtag")
+    PostHashtag = apps.get_model("posts", "PostHashtag")
+    PostMention = apps.get_model("posts", "PostMention")
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+
+    tag_links, mention_links = [], []
+    for post_id, content, created_at in Post.objects.values_list(
+        "pk", "content", "created_at"
+    ).iterator():
+        tag_links += [(post_id, name, created_at) for name in extract_hashtags(content)]
+        mention_links += [
+            (post_id, name, created_at) for name in extract_mentions(content)
+        ]
+
+    Hashtag.objects.bulk_create(
+        [Hashtag(name=name) for name in {name for _, name, _ in tag_links}],
+        ignore_conflicts=True,
+    )
+    tag_ids = dict(Hashtag.objects.values_list("name", "pk"))
+    PostHashtag.objects.bulk_create(
+        [
+            PostHashtag(post_id=post_id, hashtag_id=tag_ids[name], created_at=at)
+            for post_id, name, at in tag_links
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+    user_ids = dict(
+        User.objects.filter(
+            username__in={name for _, name, _ in mention_links}
+        ).values_list("username", "pk")
+    )
+    PostMention.objects.bulk_create(
+        [
+            PostMention(post_id=post_id, user_id=user_ids[name], created_at=at)
+            for post_id, name, at in mention_links
+            if name in user_ids
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_post_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Hashtag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('trend_key', models.FloatField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-trend_key'], name='hashtag_trend_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PostHashtag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+                ('hashtag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='post_links', to='posts.hashtag')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hashtag_links', to='posts.post')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['hashtag', '-created_at'], name='posthashtag_recent_idx')],
+                'constraints': [models.UniqueConstraint(fields=('hashtag', 'post'), name='unique_post_hashtag')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PostMention',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mentions', to='posts.post')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mentions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-created_at'], name='mention_user_idx')],
+                'constraints': [models.UniqueConstraint(fields=('post', 'user'), name='unique_mention')],
+            },
+        ),
+        migrations.RunPython(index_existing_posts, migrations.RunPython.noop),
+    ]
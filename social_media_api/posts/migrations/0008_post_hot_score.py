@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-17 17:20
+
+import posts.hot
+from django.db import migrations, models
+
+
+def populate_hot_scores(apps, schema_editor):
+    Post = apps.get_model("posts", "Post")
+    rows = list(Post.objects.only("like_count", "comment_count", "created_at"))
+    for post in rows:
+        post.hot_score = posts.hot.score(
+            post.like_count, post.comment_count, post.created_at
+        )
+    Post.objects.bulk_update(rows, ["hot_score"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_hashtags_mentions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='hot_score',
+            field=models.FloatField(default=posts.hot.initial_score),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-hot_score', '-id'], name='post_hot_idx'),
+        ),
+        migrations.RunPython(populate_hot_scores, migrations.RunPython.noop),
+    ]
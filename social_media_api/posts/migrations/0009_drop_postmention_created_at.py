@@ -0,0 +1,21 @@
+# Generated by Django 6.0 on 2026-10-17 21:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_post_hot_score'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='postmention',
+            name='mention_user_idx',
+        ),
+        migrations.RemoveField(
+            model_name='postmention',
+            name='created_at',
+        ),
+    ]
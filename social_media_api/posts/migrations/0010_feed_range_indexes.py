@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-17 22:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_drop_postmention_created_at'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_author_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='timelineentry',
+            name='timeline_recipient_idx',
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', '-created_at', '-id'], name='post_author_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['recipient', '-created_at', '-post'], name='timeline_feed_idx'),
+        ),
+    ]
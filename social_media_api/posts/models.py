@@ -1,5 +1,7 @@
 from django.db import models
 
+from . import hot
+
 
 class Post(models.Model):
     author = models.ForeignKey(
@@ -10,6 +12,25 @@ class Post(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # denormalized counters, maintained with F() updates by the like and
+    # comment views; `manage.py reconcile_counters` repairs any drift
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+    # trending rank; moved together with the counters (see posts/hot.py)
+    hot_score = models.FloatField(default=hot.initial_score)
+
+    class Meta:
+        indexes = [
+            # trending listing: keyset pages over (hot_score, id)
+            models.Index(fields=["-hot_score", "-id"], name="post_hot_idx"),
+            # global listing: PostViewSet keyset pages
+            models.Index(fields=["-created_at", "-id"], name="post_created_idx"),
+            # a user's own posts, newest first (backfill, fan-out-on-read feeds)
+            models.Index(
+                fields=["author", "-created_at", "-id"], name="post_author_idx"
+            ),
+        ]
+
 
 class Comment(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="comments")
@@ -20,6 +41,15 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="comment_created_idx"),
+            # a post's thread and its latest-comments preview
+            models.Index(
+                fields=["post", "-created_at", "-id"], name="comment_post_idx"
+            ),
+        ]
+
 
 class Like(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="likes")
@@ -29,7 +59,110 @@ class Like(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        unique_together = ("post", "user")  # A user can like a post only once
+        # A user can like a post only once; the unique index also serves
+        # every (post, user) lookup
+        unique_together = ("post", "user")
 
     def __str__(self):
         return f"{self.user} likes {self.post}"
+
+
+class TimelineEntry(models.Model):
+    """Materialized home timeline row: `post` shows up in `recipient`'s feed.
+
+    Rows are written when a post is created (fan-out-on-write) so reading a
+    feed page is a single range scan over (recipient, created_at).
+    """
+
+    recipient = models.ForeignKey(
+        "accounts.CustomUser", on_delete=models.CASCADE, related_name="timeline"
+    )
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name="timeline_entries"
+    )
+    # denormalized from the post so unfollow trimming and feed ordering
+    # never have to join back to posts_post
+    author = models.ForeignKey(
+        "accounts.CustomUser", on_delete=models.CASCADE, related_name="+"
+    )
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["recipient", "post"], name="unique_timeline_entry"
+            )
+        ]
+        indexes = [
+            # a feed page: one range read, already in (created_at, post) order
+            models.Index(
+                fields=["recipient", "-created_at", "-post"], name="timeline_feed_idx"
+            ),
+            models.Index(fields=["recipient", "author"], name="timeline_author_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} -> {self.recipient_id}"
+
+
+class Hashtag(models.Model):
+    """A `#tag` used in post content, stored lower-cased.
+
+    `trend_key` ranks tags by exponentially decayed usage (see
+    `posts/tags.py`); it only ever grows, so trending is an index scan.
+    """
+
+    name = models.CharField(max_length=100, unique=True)
+    trend_key = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["-trend_key"], name="hashtag_trend_idx")]
+
+    def __str__(self):
+        return f"#{self.name}"
+
+
+class PostHashtag(models.Model):
+    """Inverted index row: `post` uses `hashtag`."""
+
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name="hashtag_links"
+    )
+    hashtag = models.ForeignKey(
+        Hashtag, on_delete=models.CASCADE, related_name="post_links"
+    )
+    # denormalized from the post so a tag page (`TagPostsView`) is a range
+    # scan on posthashtag_recent_idx
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["hashtag", "post"], name="unique_post_hashtag"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["hashtag", "-created_at"], name="posthashtag_recent_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} #{self.hashtag_id}"
+
+
+class PostMention(models.Model):
+    """`user` was `@mentioned` in `post`."""
+
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="mentions")
+    user = models.ForeignKey(
+        "accounts.CustomUser", on_delete=models.CASCADE, related_name="mentions"
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["post", "user"], name="unique_mention")
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} @{self.user_id}"
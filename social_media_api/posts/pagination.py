@@ -1,8 +1,54 @@
 # posts/pagination.py
-from rest_framework.pagination import PageNumberPagination
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
 
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.db.models import DateTimeField, Q, prefetch_related_objects
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
-class PostPagination(PageNumberPagination):
+
+class AsyncPageNumberMixin:
+    """`apaginate_queryset()` for `PageNumberPagination` subclasses.
+
+    The total comes from `acount()` and the page from `aiterator()`; DRF's
+    page links and response shape are reused unchanged.
+    """
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        # Paginator.count is a cached_property; fill it without a blocking COUNT
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(
+                self.invalid_page_message.format(
+                    page_number=page_number, message=str(exc)
+                )
+            )
+        self.page.object_list = [
+            obj async for obj in self.page.object_list.aiterator(page_size)
+        ]
+        return list(self.page)
+
+
+class AsyncPageNumberPagination(AsyncPageNumberMixin, PageNumberPagination):
+    pass
+
+
+class PostPagination(AsyncPageNumberMixin, PageNumberPagination):
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 50
@@ -12,3 +58,216 @@ class CommentPagination(PageNumberPagination):
     page_size = 20
     page_size_query_param = "page_size"
     max_page_size = 100
+
+
+class KeysetPagination(BasePagination):
+    """Keyset ("seek") pagination over a `(sort key, id)` pair, newest first.
+
+    Each page is a `WHERE (key, id) < (last_key, last_id)` range read, so deep
+    pages cost the same as the first one, no `COUNT(*)` is issued and rows
+    inserted while a client scrolls never shift or duplicate later pages.
+    Cursors are opaque base64 tokens; clients just follow `next`/`previous`.
+    """
+
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 50
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+    # both fields descending; the second one must be unique
+    ordering = ("-created_at", "-id")
+    # parses the sort key back from a cursor when it is an annotation
+    # rather than a model field
+    key_output_field = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self._page(list(self._page_query(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """`paginate_queryset()` for async views, awaiting the page query."""
+        queryset = self._page_query(queryset, request)
+        chunk_size = self.page_size + 1
+        return self._page([obj async for obj in queryset.aiterator(chunk_size)])
+
+    def _page_query(self, queryset, request):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        key_field, id_field = (field.lstrip("-") for field in self.ordering)
+
+        self.cursor = self.decode_cursor(request, queryset.model, key_field)
+        if self.cursor is None:
+            queryset = queryset.order_by(*self.ordering)
+        else:
+            key, pk, reverse = self.cursor
+            if reverse:
+                queryset = queryset.filter(
+                    Q(**{f"{key_field}__gt": key})
+                    | Q(**{key_field: key, f"{id_field}__gt": pk})
+                ).order_by(key_field, id_field)
+            else:
+                queryset = queryset.filter(
+                    Q(**{f"{key_field}__lt": key})
+                    | Q(**{key_field: key, f"{id_field}__lt": pk})
+                ).order_by(*self.ordering)
+
+        # fetch one extra row to learn whether another page exists
+        return queryset[: self.page_size + 1]
+
+    def _page(self, results):
+        key_field, id_field = (field.lstrip("-") for field in self.ordering)
+        reverse = self.cursor is not None and self.cursor[2]
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+        if reverse:
+            results.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, self.cursor is not None
+
+        self.next_position = self.previous_position = None
+        if results and has_next:
+            last = results[-1]
+            self.next_position = (getattr(last, key_field), getattr(last, id_field))
+        if results and has_previous:
+            first = results[0]
+            self.previous_position = (
+                getattr(first, key_field),
+                getattr(first, id_field),
+            )
+        return results
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def decode_cursor(self, request, model, key_field):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            raw_key, pk, direction = json.loads(urlsafe_b64decode(encoded.encode()))
+            field = self.key_output_field or model._meta.get_field(key_field)
+            key = field.to_python(raw_key)
+            if key is None:
+                # to_python() passes null through; no row sorts against it
+                raise ValueError
+            return key, int(pk), direction == "p"
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position, reverse):
+        key, pk = position
+        if hasattr(key, "isoformat"):
+            key = key.isoformat()
+        token = json.dumps([key, pk, "p" if reverse else "n"])
+        return urlsafe_b64encode(token.encode()).decode()
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return replace_query_param(
+            self.base_url,
+            self.cursor_query_param,
+            self.encode_cursor(self.next_position, reverse=False),
+        )
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return replace_query_param(
+            self.base_url,
+            self.cursor_query_param,
+            self.encode_cursor(self.previous_position, reverse=True),
+        )
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class PostCursorPagination(KeysetPagination):
+    page_size = 10
+    max_page_size = 50
+
+
+class TagCursorPagination(PostCursorPagination):
+    """A tag page, newest first by the link row's `tagged_at` annotation."""
+
+    ordering = ("-tagged_at", "-id")
+    key_output_field = DateTimeField()
+
+
+class FeedCursorPagination(PostCursorPagination):
+    """The home feed, merged from the view's `feed_sources`.
+
+    Each source (see `posts.timeline.feed_sources`) reads its own keyset
+    page; the newest of those rows make the page. Prefetches run once, for
+    the merged page only.
+    """
+
+    ordering = ("-fed_at", "-fed_post")
+    key_output_field = DateTimeField()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        pages = [
+            list(self._page_query(source.prefetch_related(None), request))
+            for source in view.feed_sources
+        ]
+        page = self._merge(pages)
+        prefetch_related_objects(page, *queryset._prefetch_related_lookups)
+        return self._page(page)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        pages = []
+        for source in view.feed_sources:
+            source = self._page_query(source.prefetch_related(None), request)
+            pages.append([post async for post in source])
+        page = self._merge(pages)
+        await sync_to_async(prefetch_related_objects)(
+            page, *queryset._prefetch_related_lookups
+        )
+        return self._page(page)
+
+    def _merge(self, pages):
+        reverse = self.cursor is not None and self.cursor[2]
+        # a post can be both in the timeline and pulled from its author
+        unique = {post.fed_post: post for page in pages for post in page}
+        merged = sorted(
+            unique.values(),
+            key=lambda post: (post.fed_at, post.fed_post),
+            reverse=not reverse,
+        )
+        return merged[: self.page_size + 1]
+
+
+class CommentCursorPagination(KeysetPagination):
+    page_size = 20
+    max_page_size = 100
+
+
+class TrendingCursorPagination(PostCursorPagination):
+    ordering = ("-hot_score", "-id")
@@ -0,0 +1,247 @@
+# posts/search.py
+"""Ranked full-text search over posts.
+
+`?search=` on the post list is answered by a pluggable backend chosen with
+`POST_SEARCH_BACKEND` (a dotted path), or by database vendor when unset:
+
+* SQLite: an external-content FTS5 table (`posts_post_fts`) kept in sync by
+  triggers, ranked with BM25 (title weighted over content);
+* PostgreSQL: a GIN index on `to_tsvector(title || content)`, ranked with
+  `ts_rank`;
+* anything else: `icontains` matching, unranked.
+
+Every backend treats each search word as a prefix, annotates
+`search_rank` (higher is better) and `search_snippet` (content excerpt with
+the matches between `HIGHLIGHT` markers), and orders by rank.
+`render_snippet()` turns a snippet into safe HTML: the post content is
+escaped, and only then are the markers replaced with `<mark>` tags.
+"""
+import re
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import F, FloatField, Q, TextField, Value
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.module_loading import import_string
+from rest_framework.filters import BaseFilterBackend
+
+SEARCH_PARAM = "search"
+# private-use characters: they survive escaping and never occur in markup
+HIGHLIGHT = ("\ue000", "\ue001")
+MARKUP = ("<mark>", "</mark>")
+
+FTS_TABLE = "posts_post_fts"
+PG_INDEX = "post_search_idx"
+
+
+def search_terms(request) -> list[str]:
+    return re.findall(r"\w+", request.query_params.get(SEARCH_PARAM, ""))
+
+
+def render_snippet(snippet):
+    """HTML for a backend's `search_snippet`: escaped, matches in `<mark>`."""
+    if snippet is None:
+        return None
+    html = escape(snippet)
+    for marker, tag in zip(HIGHLIGHT, MARKUP):
+        html = html.replace(marker, tag)
+    return html
+
+
+class SearchBackend(ABC):
+    @abstractmethod
+    def search(self, queryset, terms):
+        """Filter `queryset` to posts matching every term, annotated and
+        ordered as described in the module docstring."""
+
+    def install(self, connection):
+        """Create whatever index the backend needs; must be idempotent."""
+
+    @staticmethod
+    def uninstall(connection):
+        pass
+
+
+class IcontainsBackend(SearchBackend):
+    """Unindexed fallback: every term must appear in the title or content."""
+
+    def search(self, queryset, terms):
+        for term in terms:
+            queryset = queryset.filter(
+                Q(title__icontains=term) | Q(content__icontains=term)
+            )
+        return queryset.annotate(
+            search_rank=Value(0.0, FloatField()),
+            search_snippet=Value(None, TextField()),
+        ).order_by("-created_at", "-id")
+
+
+class SQLiteFTSBackend(SearchBackend):
+    # bm25() weights for the (title, content) columns
+    weights = (10.0, 1.0)
+    snippet_tokens = 12
+
+    def search(self, queryset, terms):
+        match = " ".join(f'"{term}"*' for term in terms)
+        table = queryset.model._meta.db_table
+        matches = f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s"
+        # FTS5 resolves `MATCH ... AND rowid = ...` with a direct rowid lookup
+        row = f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid = "{table}"."id"'
+        weights = ", ".join(str(weight) for weight in self.weights)
+        start, stop = HIGHLIGHT
+        return (
+            queryset.filter(pk__in=RawSQL(matches, [match]))
+            .annotate(
+                # bm25() is lower for better matches
+                search_rank=RawSQL(
+                    f"SELECT -bm25({FTS_TABLE}, {weights}) {row}", [match]
+                ),
+                search_snippet=RawSQL(
+                    f"SELECT snippet({FTS_TABLE}, 1, %s, %s, '…', %s) {row}",
+                    [start, stop, self.snippet_tokens, match],
+                ),
+            )
+            .order_by("-search_rank", "-id")
+        )
+
+    def install(self, connection):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+                "AND tbl_name = 'posts_post'"
+            )
+            triggers = {row[0] for row in cursor.fetchall()}
+            if triggers >= set(_SQLITE_TRIGGERS):
+                return
+            # a first install, or Django rebuilt posts_post (ALTER TABLE on
+            # SQLite copies the table and drops its triggers)
+            cursor.execute(_SQLITE_TABLE)
+            for name, sql in _SQLITE_TRIGGERS.items():
+                cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+                cursor.execute(sql)
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+    @staticmethod
+    def uninstall(connection):
+        with connection.cursor() as cursor:
+            for name in _SQLITE_TRIGGERS:
+                cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class PostgresSearchBackend(SearchBackend):
+    config = "english"
+
+    def vector(self):
+        from django.contrib.postgres.search import SearchVector
+
+        # must stay identical to the indexed expression (see install)
+        return SearchVector("title", "content", config=self.config)
+
+    def search(self, queryset, terms):
+        from django.contrib.postgres.search import (
+            SearchHeadline,
+            SearchQuery,
+            SearchRank,
+        )
+
+        query = SearchQuery(
+            " & ".join(f"{term}:*" for term in terms),
+            config=self.config,
+            search_type="raw",
+        )
+        start, stop = HIGHLIGHT
+        return (
+            queryset.annotate(search_document=self.vector())
+            .filter(search_document=query)
+            .annotate(
+                search_rank=SearchRank(F("search_document"), query),
+                search_snippet=SearchHeadline(
+                    "content",
+                    query,
+                    config=self.config,
+                    start_sel=start,
+                    stop_sel=stop,
+                ),
+            )
+            .order_by("-search_rank", "-id")
+        )
+
+    def install(self, connection):
+        from django.contrib.postgres.indexes import GinIndex
+
+        from .models import Post
+
+        with connection.cursor() as cursor:
+            existing = connection.introspection.get_constraints(
+                cursor, Post._meta.db_table
+            )
+        if PG_INDEX in existing:
+            return
+        with connection.schema_editor() as editor:
+            editor.add_index(Post, GinIndex(self.vector(), name=PG_INDEX))
+
+    @staticmethod
+    def uninstall(connection):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP INDEX IF EXISTS {PG_INDEX}")
+
+
+_VENDOR_BACKENDS = {
+    "sqlite": SQLiteFTSBackend,
+    "postgresql": PostgresSearchBackend,
+}
+
+
+def get_backend(using="default") -> SearchBackend:
+    path = getattr(settings, "POST_SEARCH_BACKEND", None)
+    if path:
+        return import_string(path)()
+    vendor = connections[using].vendor
+    return _VENDOR_BACKENDS.get(vendor, IcontainsBackend)()
+
+
+class PostSearchFilter(BaseFilterBackend):
+    """`?search=` for posts, served by the configured search backend."""
+
+    def filter_queryset(self, request, queryset, view):
+        terms = search_terms(request)
+        if not terms:
+            return queryset
+        return get_backend(queryset.db).search(queryset, terms)
+
+
+_SQLITE_TABLE = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+    title, content,
+    content='posts_post', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+)
+"""
+
+_SQLITE_TRIGGERS = {
+    "posts_post_fts_insert": f"""
+CREATE TRIGGER posts_post_fts_insert AFTER INSERT ON posts_post BEGIN
+    INSERT INTO {FTS_TABLE}(rowid, title, content)
+    VALUES (new.id, new.title, new.content);
+END
+""",
+    "posts_post_fts_delete": f"""
+CREATE TRIGGER posts_post_fts_delete AFTER DELETE ON posts_post BEGIN
+    INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, content)
+    VALUES ('delete', old.id, old.title, old.content);
+END
+""",
+    # counter updates (likes, comments) leave the index alone
+    "posts_post_fts_update": f"""
+CREATE TRIGGER posts_post_fts_update AFTER UPDATE OF title, content ON posts_post
+BEGIN
+    INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, content)
+    VALUES ('delete', old.id, old.title, old.content);
+    INSERT INTO {FTS_TABLE}(rowid, title, content)
+    VALUES (new.id, new.title, new.content);
+END
+""",
+}
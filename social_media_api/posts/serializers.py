@@ -1,5 +1,22 @@
+from django.conf import settings
+from django.db.models import BooleanField, Exists, OuterRef, Prefetch, Value
 from rest_framework import serializers
-from .models import Post, Comment
+from .models import Post, Comment, Hashtag, Like
+from . import search, tags
+from .eager_loading import eager_load
+
+
+def comment_preview_size() -> int:
+    return getattr(settings, "POST_COMMENT_PREVIEW_SIZE", 3)
+
+
+def annotate_liked_by_me(queryset, user):
+    """Annotate `liked_by_me` for a whole page with one `EXISTS` subquery."""
+    if not user.is_authenticated:
+        return queryset.annotate(liked_by_me=Value(False, BooleanField()))
+    return queryset.annotate(
+        liked_by_me=Exists(Like.objects.filter(post=OuterRef("pk"), user_id=user.pk))
+    )
 
 
 class CommentSerializer(serializers.ModelSerializer):
@@ -14,6 +31,9 @@ class CommentSerializer(serializers.ModelSerializer):
 class PostSerializer(serializers.ModelSerializer):
     author = serializers.StringRelatedField(read_only=True)
     comments = CommentSerializer(many=True, read_only=True)
+    # filled by `annotate_liked_by_me`; a post without it (e.g. one just
+    # created) has not been liked by the requester
+    liked_by_me = serializers.SerializerMethodField()
 
     class Meta:
         model = Post
@@ -24,6 +44,84 @@ class PostSerializer(serializers.ModelSerializer):
             "content",
             "created_at",
             "updated_at",
+            "like_count",
+            "liked_by_me",
+            "comments",
+        ]
+        read_only_fields = [
+            "id",
+            "author",
+            "created_at",
+            "updated_at",
+            "like_count",
             "comments",
         ]
-        read_only_fields = ["id", "author", "created_at", "updated_at", "comments"]
+
+    def get_liked_by_me(self, obj):
+        return getattr(obj, "liked_by_me", False)
+
+
+class PostListSerializer(PostSerializer):
+    """List-mode post: comment count plus only the latest few comments.
+
+    The full thread is served by `/api/comments/?post=<id>`.
+    """
+
+    latest_comments = CommentSerializer(many=True, read_only=True)
+
+    class Meta(PostSerializer.Meta):
+        fields = [
+            "id",
+            "author",
+            "title",
+            "content",
+            "created_at",
+            "updated_at",
+            "like_count",
+            "liked_by_me",
+            "comment_count",
+            "latest_comments",
+        ]
+        read_only_fields = [
+            "id",
+            "author",
+            "created_at",
+            "updated_at",
+            "like_count",
+            "comment_count",
+        ]
+
+    @classmethod
+    def prepare_queryset(cls, queryset):
+        # a sliced Prefetch runs as a single ROW_NUMBER() window query
+        latest = eager_load(
+            Comment.objects.order_by("-created_at", "-id"), CommentSerializer
+        )[: comment_preview_size()]
+        return queryset.prefetch_related(
+            Prefetch("comments", queryset=latest, to_attr="latest_comments")
+        )
+
+
+class PostSearchSerializer(PostListSerializer):
+    """A search hit: the list representation plus its rank and snippet."""
+
+    search_rank = serializers.FloatField(read_only=True)
+    search_snippet = serializers.SerializerMethodField()
+
+    class Meta(PostListSerializer.Meta):
+        fields = PostListSerializer.Meta.fields + ["search_rank", "search_snippet"]
+
+    def get_search_snippet(self, obj):
+        return search.render_snippet(obj.search_snippet)
+
+
+class HashtagSerializer(serializers.ModelSerializer):
+    # uses, each decayed by TAG_TREND_HALF_LIFE, as of this request
+    score = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Hashtag
+        fields = ["name", "score"]
+
+    def get_score(self, obj):
+        return round(tags.current_score(obj.trend_key), 3)
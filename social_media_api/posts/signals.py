@@ -0,0 +1,51 @@
+# posts/signals.py
+"""Invalidate cached post details when a post, comment or like changes.
+
+Invalidation waits for the surrounding transaction to commit, so a
+concurrent rebuild cannot cache the pre-commit state under the new version.
+Counter-only `F()` updates do not send signals; they always accompany a
+Like or Comment write that does.
+
+Saving a post also re-indexes its `#hashtags` and `@mentions`.
+
+`post_migrate` (re)installs the search index, which SQLite loses whenever a
+migration rebuilds the posts table.
+"""
+from django.db import connections, transaction
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from . import cache, search, tags
+from .models import Comment, Like, Post
+
+
+def _invalidate_on_commit(post_id):
+    transaction.on_commit(lambda: cache.invalidate(post_id))
+
+
+@receiver([post_save, post_delete], sender=Post)
+def post_changed(sender, instance, **kwargs):
+    _invalidate_on_commit(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def index_tags_and_mentions(sender, instance, created, update_fields, **kwargs):
+    if update_fields is None or "content" in update_fields:
+        tags.sync_post(instance, created)
+
+
+@receiver([post_save, post_delete], sender=Comment)
+@receiver([post_save, post_delete], sender=Like)
+def post_child_changed(sender, instance, **kwargs):
+    _invalidate_on_commit(instance.post_id)
+
+
+@receiver(post_migrate)
+def ensure_search_index(sender, using, **kwargs):
+    if sender.name != "posts":
+        return
+    connection = connections[using]
+    applied = MigrationRecorder(connection).applied_migrations()
+    if ("posts", "0006_post_search") in applied:
+        search.get_backend(using).install(connection)
@@ -0,0 +1,144 @@
+# posts/tags.py
+"""`#hashtag` and `@mention` extraction into indexed link tables.
+
+`sync_post()` runs when a post is saved: it parses the content, adds and
+removes `PostHashtag` / `PostMention` rows by diffing against what is
+stored, bumps the trend of newly used tags and queues one batch of
+"mentioned you" notifications for users who were not mentioned before.
+
+Trending uses forward decay. A use at time t adds 2 ** ((t - EPOCH) / H) to
+a tag, H being `TAG_TREND_HALF_LIFE`; `trend_key` stores the log2 of that
+sum, so it only grows and orders tags exactly like their decayed scores do
+at any moment. `current_score()` turns it back into "uses, decayed to now".
+"""
+import re
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Abs, Greatest, Log, Power
+from django.utils import timezone
+
+from notifications import outbox
+
+from .models import Hashtag, PostHashtag, PostMention
+
+HASHTAG_RE = re.compile(r"(?<![\w&#])#(\w{1,100})")
+MENTION_RE = re.compile(r"(?<![\w@])@([\w.@+-]{1,150})")
+
+EPOCH = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+MENTION_VERB = "mentioned you in a post"
+
+
+def half_life() -> timedelta:
+    return getattr(settings, "TAG_TREND_HALF_LIFE", timedelta(hours=6))
+
+
+def extract_hashtags(text) -> set[str]:
+    return {tag.lower() for tag in HASHTAG_RE.findall(text or "")}
+
+
+def extract_mentions(text) -> set[str]:
+    # a sentence-ending "." is not part of the username
+    return {name.rstrip(".") for name in MENTION_RE.findall(text or "")} - {""}
+
+
+def decay_units(when=None) -> float:
+    """Half-lives elapsed between EPOCH and `when` (default: now)."""
+    when = when or timezone.now()
+    return (when - EPOCH) / half_life()
+
+
+def current_score(trend_key, now=None) -> float:
+    if trend_key is None:
+        return 0.0
+    return 2 ** (trend_key - decay_units(now))
+
+
+def sync_post(post, created):
+    tags = extract_hashtags(post.content)
+    mentions = extract_mentions(post.content)
+    if created and not tags and not mentions:
+        return
+
+    with transaction.atomic():
+        _sync_hashtags(post, tags, created)
+        _sync_mentions(post, mentions, created)
+
+
+def _sync_hashtags(post, names, created):
+    current = {}
+    if not created:
+        current = dict(
+            PostHashtag.objects.filter(post=post).values_list("hashtag__name", "pk")
+        )
+    added = names - current.keys()
+    removed = [pk for name, pk in current.items() if name not in names]
+    if removed:
+        PostHashtag.objects.filter(pk__in=removed).delete()
+    if not added:
+        return
+
+    Hashtag.objects.bulk_create(
+        [Hashtag(name=name) for name in added], ignore_conflicts=True
+    )
+    tag_ids = list(
+        Hashtag.objects.filter(name__in=added).values_list("pk", flat=True)
+    )
+    PostHashtag.objects.bulk_create(
+        [
+            PostHashtag(post=post, hashtag_id=tag_id, created_at=post.created_at)
+            for tag_id in tag_ids
+        ],
+        ignore_conflicts=True,
+    )
+    record_use(tag_ids)
+
+
+def record_use(tag_ids, when=None):
+    """Add one decayed use to each tag, computed in the UPDATE itself.
+
+    log2(2**key + 2**units) == max + log2(1 + 2**-|key - units|), which
+    stays finite however far apart the two are.
+    """
+    units = Value(decay_units(when))
+    key = F("trend_key")
+    Hashtag.objects.filter(pk__in=tag_ids).update(
+        trend_key=Case(
+            When(trend_key__isnull=True, then=units),
+            default=Greatest(key, units) + Log(2.0, 1 + Power(2.0, -Abs(key - units))),
+        )
+    )
+
+
+def _sync_mentions(post, usernames, created):
+    current = set()
+    if not created:
+        current = set(
+            PostMention.objects.filter(post=post).values_list(
+                "user__username", flat=True
+            )
+        )
+    added = usernames - current
+    removed = current - usernames
+    if removed:
+        PostMention.objects.filter(post=post, user__username__in=removed).delete()
+    if not added:
+        return
+
+    user_ids = list(
+        get_user_model()
+        .objects.filter(username__in=added)
+        .values_list("pk", flat=True)
+    )
+    PostMention.objects.bulk_create(
+        [PostMention(post=post, user_id=user_id) for user_id in user_ids],
+        ignore_conflicts=True,
+    )
+    outbox.enqueue_many(
+        (user_id, post.author_id, MENTION_VERB, post)
+        for user_id in user_ids
+        if user_id != post.author_id
+    )
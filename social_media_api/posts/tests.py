@@ -1,3 +1,919 @@
-from django.test import TestCase
+import threading
+import time
+from base64 import urlsafe_b64encode
+from datetime import timedelta
+from io import StringIO
+from unittest import skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from notifications import outbox
+from notifications.models import NotificationOutbox
+from social_media_api.async_views import AsyncAPIView
+from . import cache as post_cache, hot, search, tags, timeline
+from .models import (
+    Comment,
+    Hashtag,
+    Like,
+    Post,
+    PostHashtag,
+    PostMention,
+    TimelineEntry,
+)
+
+User = get_user_model()
+
+
+class TimelineTests(TestCase):
+    """Fan-out-on-write feed: post creation, follow backfill, unfollow trim."""
+
+    client: APIClient
+
+    def setUp(self):
+        self.client = APIClient()
+        self.alice = User.objects.create_user(username="alice", password="pass12345")
+        self.bob = User.objects.create_user(username="bob", password="pass12345")
+        self.carol = User.objects.create_user(username="carol", password="pass12345")
+
+    def feed_titles(self, user):
+        self.client.force_authenticate(user)
+        response = self.client.get("/api/feed/")
+        self.assertEqual(response.status_code, 200)
+        return [post["title"] for post in response.data["results"]]
+
+    def create_post(self, user, title):
+        self.client.force_authenticate(user)
+        response = self.client.post(
+            "/api/posts/", {"title": title, "content": "..."}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.data["id"]
+
+    def test_new_post_is_fanned_out_to_followers(self):
+        self.alice.following.add(self.bob)
+        post_id = self.create_post(self.bob, "hello")
+
+        self.assertTrue(
+            TimelineEntry.objects.filter(recipient=self.alice, post_id=post_id).exists()
+        )
+        self.assertEqual(self.feed_titles(self.alice), ["hello"])
+        self.assertEqual(self.feed_titles(self.carol), [])
+
+    def test_follow_backfills_and_unfollow_trims(self):
+        Post.objects.create(author=self.bob, title="older", content="...")
+        Post.objects.create(author=self.bob, title="newer", content="...")
+
+        self.client.force_authenticate(self.alice)
+        self.client.post(f"/api/accounts/follow/{self.bob.pk}/")
+        self.assertEqual(self.feed_titles(self.alice), ["newer", "older"])
+
+        self.client.force_authenticate(self.alice)
+        self.client.post(f"/api/accounts/unfollow/{self.bob.pk}/")
+        self.assertEqual(self.feed_titles(self.alice), [])
+        self.assertFalse(TimelineEntry.objects.filter(recipient=self.alice).exists())
+
+    @override_settings(FEED_FANOUT_MAX_FOLLOWERS=1)
+    def test_high_fanout_author_is_merged_at_read_time(self):
+        self.alice.following.add(self.bob)
+        self.carol.following.add(self.bob)
+        self.carol.following.add(self.alice)
+        self.create_post(self.alice, "fanned out")
+        self.create_post(self.bob, "celebrity")
+
+        self.bob.refresh_from_db()
+        self.assertTrue(self.bob.fan_out_on_read)
+        self.assertFalse(TimelineEntry.objects.filter(author=self.bob).exists())
+        self.assertEqual(self.feed_titles(self.carol), ["celebrity", "fanned out"])
+
+
+class KeysetPaginationTests(TestCase):
+    """Cursor pagination on (created_at, id): stable pages, no COUNT query."""
+
+    client: APIClient
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="dave", password="pass12345")
+        self.client.force_authenticate(self.user)
+        for i in range(25):
+            Post.objects.create(author=self.user, title=f"post {i}", content="...")
+
+    def test_walks_all_pages_without_duplicates(self):
+        seen = []
+        url = "/api/posts/"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn("count", response.data)
+            seen += [post["id"] for post in response.data["results"]]
+            url = response.data["next"]
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+
+    def test_new_posts_do_not_shift_next_page(self):
+        first = self.client.get("/api/posts/")
+        Post.objects.create(author=self.user, title="breaking", content="...")
+        second = self.client.get(first.data["next"])
+
+        first_ids = {post["id"] for post in first.data["results"]}
+        second_ids = {post["id"] for post in second.data["results"]}
+        self.assertFalse(first_ids & second_ids)
+        self.assertEqual(len(second_ids), 10)
+
+        back = self.client.get(second.data["previous"])
+        self.assertEqual({post["id"] for post in back.data["results"]}, first_ids)
+
+    def test_no_count_query(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get("/api/posts/?page_size=5")
+        # PageNumberPagination issues `SELECT COUNT(*) AS "__count"`
+        self.assertFalse(any("__count" in q["sql"] for q in ctx.captured_queries))
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/api/posts/?cursor=garbage")
+        self.assertEqual(response.status_code, 404)
+
+        null_key = urlsafe_b64encode(b'[null, 1, "n"]').decode()
+        for url in ("/api/posts/", "/api/posts/trending/", "/api/feed/"):
+            with self.subTest(url=url):
+                response = self.client.get(url, {"cursor": null_key})
+                self.assertEqual(response.status_code, 404)
+
+
+class QueryBudgetTests(TestCase):
+    """List endpoints must cost a constant number of queries per page."""
+
+    client: APIClient
+
+    def setUp(self):
+        self.client = APIClient()
+        self.reader = User.objects.create_user(username="erin", password="pass12345")
+        self.client.force_authenticate(self.reader)
+
+    def seed(self, posts):
+        for _ in range(posts):
+            author = User.objects.create(username=f"author{User.objects.count()}")
+            self.reader.following.add(author)
+            post = Post.objects.create(author=author, title="t", content="...")
+            TimelineEntry.objects.create(
+                recipient=self.reader,
+                post=post,
+                author=author,
+                created_at=post.created_at,
+            )
+            for _ in range(3):
+                commenter = User.objects.create(
+                    username=f"commenter{User.objects.count()}"
+                )
+                Comment.objects.create(post=post, author=commenter, content="hi")
+
+    def assertQueryBudget(self, url, budget):
+        # same budget for a nearly empty page and a full one
+        for posts in (1, 9):
+            self.seed(posts)
+            with self.assertNumQueries(budget):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+
+    def test_post_list_budget(self):
+        # page + comments prefetch (authors joined in both)
+        self.assertQueryBudget("/api/posts/", 2)
+
+    def test_feed_budget(self):
+        # fan-out-on-read check + page + comments prefetch
+        self.assertQueryBudget("/api/feed/", 3)
+
+    def test_comment_list_budget(self):
+        self.assertQueryBudget("/api/comments/", 1)
+
+
+class CommentPreviewTests(TestCase):
+    """List pages embed a comment count and only the latest comments."""
+
+    client: APIClient
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create(username="frank")
+        self.client.force_authenticate(self.user)
+        self.post = Post.objects.create(author=self.user, title="viral", content="...")
+        self.other = Post.objects.create(author=self.user, title="quiet", content="...")
+        for i in range(5):
+            Comment.objects.create(post=self.post, author=self.user, content=f"c{i}")
+        # counters are maintained by the views; seed it for ORM-created rows
+        Post.objects.filter(pk=self.post.pk).update(comment_count=5)
+
+    @override_settings(POST_COMMENT_PREVIEW_SIZE=2)
+    def test_list_embeds_latest_comments_only(self):
+        response = self.client.get("/api/posts/")
+        by_title = {post["title"]: post for post in response.data["results"]}
+
+        viral = by_title["viral"]
+        self.assertNotIn("comments", viral)
+        self.assertEqual(viral["comment_count"], 5)
+        self.assertEqual(
+            [c["content"] for c in viral["latest_comments"]], ["c4", "c3"]
+        )
+        self.assertEqual(by_title["quiet"]["comment_count"], 0)
+        self.assertEqual(by_title["quiet"]["latest_comments"], [])
+
+    def test_detail_keeps_full_thread(self):
+        response = self.client.get(f"/api/posts/{self.post.pk}/")
+        self.assertEqual(len(response.data["comments"]), 5)
+
+    def test_comments_filtered_by_post(self):
+        Comment.objects.create(post=self.other, author=self.user, content="x")
+        response = self.client.get(f"/api/comments/?post={self.post.pk}&page_size=3")
+        self.assertEqual(
+            [c["content"] for c in response.data["results"]], ["c4", "c3", "c2"]
+        )
+        rest = self.client.get(response.data["next"])
+        self.assertEqual([c["content"] for c in rest.data["results"]], ["c1", "c0"])
+
+        bad = self.client.get("/api/comments/?post=abc")
+        self.assertEqual(bad.status_code, 400)
+
+
+class CounterTests(TestCase):
+    """Denormalized counters follow likes, comments and follows."""
+
+    client: APIClient
+
+    def setUp(self):
+        self.client = APIClient()
+        self.author = User.objects.create(username="gina")
+        self.fan = User.objects.create(username="hank")
+        self.post = Post.objects.create(author=self.author, title="t", content="...")
+        self.client.force_authenticate(self.fan)
+
+    def test_like_and_comment_counters(self):
+        self.client.post(f"/api/posts/{self.post.pk}/like/")
+        self.client.post(f"/api/posts/{self.post.pk}/like/")  # duplicate
+        response = self.client.post(
+            "/api/comments/", {"post": self.post.pk, "content": "hi"}, format="json"
+        )
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.like_count, self.post.comment_count), (1, 1))
+
+        self.client.post(f"/api/posts/{self.post.pk}/unlike/")
+        self.client.delete(f"/api/comments/{response.data['id']}/")
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.like_count, self.post.comment_count), (0, 0))
+
+    def test_follow_counters(self):
+        self.client.post(f"/api/accounts/follow/{self.author.pk}/")
+        self.client.post(f"/api/accounts/follow/{self.author.pk}/")  # duplicate
+        self.author.refresh_from_db()
+        self.fan.refresh_from_db()
+        self.assertEqual(self.author.follower_count, 1)
+        self.assertEqual(self.fan.following_count, 1)
+
+        self.client.post(f"/api/accounts/unfollow/{self.author.pk}/")
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.follower_count, 0)
+
+    def test_reconcile_counters_fixes_drift(self):
+        Like.objects.create(post=self.post, user=self.fan)
+        self.fan.following.add(self.author)
+        Post.objects.filter(pk=self.post.pk).update(comment_count=7)
+
+        call_command("reconcile_counters", batch_size=1, stdout=StringIO())
+
+        self.post.refresh_from_db()
+        self.author.refresh_from_db()
+        self.assertEqual((self.post.like_count, self.post.comment_count), (1, 0))
+        self.assertEqual(self.author.follower_count, 1)
+
+
+class LikeToggleTests(TestCase):
+    """PUT/DELETE on /like/ are idempotent and report the like count."""
+
+    client: APIClient
+
+    def setUp(self):
+        self.client = APIClient()
+        self.author = User.objects.create(username="uma")
+        self.fan = User.objects.create(username="vic")
+        self.post = Post.objects.create(author=self.author, title="t", content="...")
+        self.url = f"/api/posts/{self.post.pk}/like/"
+        self.client.force_authenticate(self.fan)
+
+    def test_put_and_delete_are_idempotent(self):
+        for _ in range(2):
+            response = self.client.put(self.url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data, {"liked": True, "like_count": 1})
+        self.assertEqual(Like.objects.count(), 1)
+        self.assertEqual(NotificationOutbox.objects.count(), 1)
+
+        for _ in range(2):
+            response = self.client.delete(self.url)
+            self.assertEqual(response.data, {"liked": False, "like_count": 0})
+        self.assertFalse(Like.objects.exists())
+
+    def test_repeat_like_never_loads_the_post(self):
+        self.client.put(self.url)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.put(self.url)
+        selects = [q["sql"] for q in ctx.captured_queries if "SELECT" in q["sql"]]
+        self.assertEqual(len(selects), 1)  # the like_count read
+        self.assertIn('"like_count"', selects[0])
+
+    def test_unknown_post(self):
+        url = f"/api/posts/{self.post.pk + 100}/like/"
+        self.assertEqual(self.client.put(url).status_code, 404)
+        self.assertEqual(self.client.delete(url).status_code, 404)
+        self.assertFalse(Like.objects.exists())
+
+
+class LikedByMeTests(TestCase):
+    """liked_by_me/like_count come from the page query, not per-post lookups."""
+
+    client: APIClient
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.reader = User.objects.create(username="wes")
+        author = User.objects.create(username="xena")
+        self.reader.following.add(author)
+        self.posts = []
+        for i in range(4):
+            post = Post.objects.create(author=author, title=f"t{i}", content="...")
+            timeline.fan_out_post(post)
+            self.posts.append(post)
+        self.client.force_authenticate(self.reader)
+        for post in self.posts[::2]:
+            self.client.put(f"/api/posts/{post.pk}/like/")
+
+    def test_list_feed_and_detail(self):
+        liked = {p.pk for p in self.posts[::2]}
+        for url in ("/api/posts/", "/api/feed/"):
+            with self.assertNumQueries(3 if url == "/api/feed/" else 2):
+                results = self.client.get(url).data["results"]
+            self.assertEqual(
+                {r["id"] for r in results if r["liked_by_me"]}, liked, url
+            )
+            self.assertEqual(
+                {r["like_count"] for r in results if r["id"] in liked}, {1}
+            )
+
+        detail = self.client.get(f"/api/posts/{self.posts[0].pk}/").data
+        self.assertTrue(detail["liked_by_me"])
+
+        other = User.objects.create(username="yuri")
+        self.client.force_authenticate(other)
+        results = self.client.get("/api/posts/").data["results"]
+        self.assertFalse(any(r["liked_by_me"] for r in results))
+
+
+class ConditionalRequestTests(TestCase):
+    """ETag/Last-Modified revalidation and If-Match on writes."""
+
+    client: APIClient
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create(username="zoe")
+        self.post = Post.objects.create(author=self.user, title="t", content="...")
+        self.comment = Comment.objects.create(
+            post=self.post, author=self.user, content="c"
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_unchanged_page_is_not_modified(self):
+        for url in ("/api/posts/", "/api/feed/", f"/api/posts/{self.post.pk}/"):
+            etag = self.client.get(url)["ETag"]
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304, url)
+            self.assertEqual(response["ETag"], etag)
+
+        etag = self.client.get("/api/posts/")["ETag"]
+        self.client.put(f"/api/posts/{self.post.pk}/like/")  # bumps counters only
+        response = self.client.get("/api/posts/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Last-Modified", response)
+
+    def test_comments_use_last_modified(self):
+        url = f"/api/comments/{self.comment.pk}/"
+        last_modified = self.client.get(url)["Last-Modified"]
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_comment_lists_revalidate_by_etag_only(self):
+        Comment.objects.create(post=self.post, author=self.user, content="d")
+        url = f"/api/comments/?post={self.post.pk}"
+        response = self.client.get(url)
+        self.assertNotIn("Last-Modified", response)
+
+        # removing a row changes the page but not its newest updated_at
+        self.comment.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 200)
+
+    def test_if_match_guards_updates(self):
+        url = f"/api/posts/{self.post.pk}/"
+        etag = self.client.get(url)["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                url, {"title": "new"}, format="json", HTTP_IF_MATCH=etag
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(url)["ETag"], response["ETag"])
+
+        stale = self.client.patch(
+            url, {"title": "newer"}, format="json", HTTP_IF_MATCH=etag
+        )
+        self.assertEqual(stale.status_code, 412)
+        self.assertEqual(
+            self.client.delete(url, HTTP_IF_MATCH=etag).status_code, 412
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.title, "new")
+
+
+@override_settings(NOTIFICATIONS_OUTBOX_WORKER="external")
+class PostDetailCacheTests(TestCase):
+    """Post details are served from a versioned cache, rebuilt once per change."""
+
+    client: APIClient
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.author = User.objects.create(username="abe")
+        self.fan = User.objects.create(username="bea")
+        self.post = Post.objects.create(author=self.author, title="t", content="...")
+        self.url = f"/api/posts/{self.post.pk}/"
+        self.client.force_authenticate(self.fan)
+
+    def get(self):
+        return self.client.get(self.url).data
+
+    def test_hit_costs_one_query_and_writes_invalidate(self):
+        self.get()
+        with self.assertNumQueries(1):  # liked_by_me
+            self.assertFalse(self.get()["liked_by_me"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(f"/api/posts/{self.post.pk}/like/")
+        data = self.get()
+        self.assertEqual((data["like_count"], data["liked_by_me"]), (1, True))
+
+        self.client.force_authenticate(self.author)
+        self.assertFalse(self.get()["liked_by_me"])  # same entry, other viewer
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                "/api/comments/",
+                {"post": self.post.pk, "content": "hi"},
+                format="json",
+            )
+        self.assertEqual([c["content"] for c in self.get()["comments"]], ["hi"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(self.url)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_concurrent_miss_builds_once(self):
+        builds = []
+
+        def build():
+            builds.append(1)
+            time.sleep(0.2)
+            return {"data": "entry"}
+
+        threads = [
+            threading.Thread(target=post_cache.get_or_build, args=(42, build))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(builds), 1)
+        self.assertEqual(post_cache.get_or_build(42, build), {"data": "entry"})
+
+class SearchTests(TestCase):
+    """?search= is served by the ranked full-text backend."""
+
+    client: APIClient
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create(username="cal")
+        self.client.force_authenticate(self.user)
+        self.in_content = Post.objects.create(
+            author=self.user, title="Weekend", content="Notes on Django signals"
+        )
+        self.in_title = Post.objects.create(
+            author=self.user, title="Django tips", content="Short ones"
+        )
+        Post.objects.create(author=self.user, title="Other", content="Nothing here")
+
+    def search(self, query):
+        response = self.client.get("/api/posts/", {"search": query})
+        self.assertEqual(response.status_code, 200)
+        return response.data["results"]
+
+    @skipUnless(connection.vendor == "sqlite", "FTS5 backend")
+    def test_ranked_prefix_search_with_snippets(self):
+        results = self.search("djan")
+        self.assertEqual(
+            [r["id"] for r in results], [self.in_title.pk, self.in_content.pk]
+        )
+        self.assertGreater(results[0]["search_rank"], results[1]["search_rank"])
+        self.assertIn("<mark>Django</mark>", results[1]["search_snippet"])
+        results = self.search("django signals")
+        self.assertEqual([r["id"] for r in results], [self.in_content.pk])
+
+    @skipUnless(connection.vendor == "sqlite", "FTS5 backend")
+    def test_snippet_escapes_content(self):
+        Post.objects.create(
+            author=self.user,
+            title="x",
+            content="<script>alert(1)</script> hello world",
+        )
+        (result,) = self.search("hello")
+        self.assertEqual(
+            result["search_snippet"],
+            "&lt;script&gt;alert(1)&lt;/script&gt; <mark>hello</mark> world",
+        )
+
+    @skipUnless(connection.vendor == "sqlite", "FTS5 backend")
+    def test_index_follows_writes(self):
+        self.in_title.title = "Flask tips"
+        self.in_title.save()
+        Post.objects.filter(pk=self.in_title.pk).update(like_count=3)
+        self.in_content.delete()
+        self.assertEqual(self.search("django"), [])
+        self.assertEqual([r["id"] for r in self.search("flask")], [self.in_title.pk])
+
+    @override_settings(POST_SEARCH_BACKEND="posts.search.IcontainsBackend")
+    def test_fallback_backend(self):
+        results = self.search("django")
+        self.assertEqual(
+            {r["id"] for r in results}, {self.in_title.pk, self.in_content.pk}
+        )
+        self.assertIsNone(results[0]["search_snippet"])
+
+    def test_backend_must_implement_search(self):
+        class Incomplete(search.SearchBackend):
+            pass
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+
+class HashtagMentionTests(TestCase):
+    """#tags and @mentions are indexed on save and served per tag."""
+
+    client: APIClient
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.author = User.objects.create(username="dan")
+        self.bob = User.objects.create(username="bob")
+        self.eve = User.objects.create(username="eve")
+        self.client.force_authenticate(self.author)
+
+    def test_tags_and_mentions_follow_edits(self):
+        response = self.client.post(
+            "/api/posts/",
+            {"title": "t", "content": "#Django and #python, cc @bob @eve. @nobody"},
+            format="json",
+        )
+        post = Post.objects.get(pk=response.data["id"])
+
+        results = self.client.get("/api/tags/django/").data["results"]
+        self.assertEqual([r["id"] for r in results], [post.pk])
+        self.assertEqual(
+            set(PostMention.objects.values_list("user__username", flat=True)),
+            {"bob", "eve"},
+        )
+        self.assertEqual(
+            NotificationOutbox.objects.filter(verb=tags.MENTION_VERB).count(), 2
+        )
+
+        self.client.patch(
+            f"/api/posts/{post.pk}/",
+            {"content": "#django only, cc @bob and @dan"},
+            format="json",
+        )
+        self.assertEqual(self.client.get("/api/tags/python/").data["results"], [])
+        self.assertEqual(
+            set(PostMention.objects.values_list("user__username", flat=True)),
+            {"bob", "dan"},
+        )
+        # bob was already notified; the author mentioning themselves is not
+        self.assertEqual(
+            NotificationOutbox.objects.filter(verb=tags.MENTION_VERB).count(), 2
+        )
+        self.assertEqual(self.client.get("/api/tags/nope/").status_code, 404)
+
+    def test_tag_page_is_ordered_and_paged_by_the_link(self):
+        posts = [
+            Post.objects.create(author=self.author, title="t", content="#django")
+            for _ in range(3)
+        ]
+        # tagged in the opposite order to the posts' own creation
+        now = timezone.now()
+        for age, post in enumerate(posts):
+            PostHashtag.objects.filter(post=post).update(
+                created_at=now - timedelta(minutes=age)
+            )
+
+        with CaptureQueriesContext(connection) as queries:
+            page = self.client.get("/api/tags/django/", {"page_size": 2}).data
+        self.assertEqual([r["id"] for r in page["results"]], [posts[0].pk, posts[1].pk])
+        (sql,) = [q["sql"] for q in queries if "posts_posthashtag" in q["sql"]]
+        self.assertEqual(sql.count('JOIN "posts_posthashtag"'), 1)
+
+        page = self.client.get(page["next"]).data
+        self.assertEqual([r["id"] for r in page["results"]], [posts[2].pk])
+        page = self.client.get(page["previous"]).data
+        self.assertEqual([r["id"] for r in page["results"]], [posts[0].pk, posts[1].pk])
+
+    def test_trending_decays_with_time(self):
+        old, new = Hashtag.objects.bulk_create(
+            [Hashtag(name="old"), Hashtag(name="new")]
+        )
+        now = timezone.now()
+        for _ in range(3):
+            tags.record_use([old.pk], when=now - 2 * tags.half_life())
+        tags.record_use([new.pk], when=now)
+
+        response = self.client.get("/api/tags/", {"limit": 5})
+        self.assertEqual([t["name"] for t in response.data], ["new", "old"])
+        self.assertAlmostEqual(response.data[0]["score"], 1.0, places=2)
+        self.assertAlmostEqual(response.data[1]["score"], 0.75, places=2)
+
+
+class TrendingTests(TestCase):
+    """Hot scores move with likes/comments and drive /posts/trending/."""
+
+    client: APIClient
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create(username="fay")
+        self.client.force_authenticate(self.user)
+        self.older = Post.objects.create(author=self.user, title="a", content="...")
+        self.newer = Post.objects.create(author=self.user, title="b", content="...")
+        # the older post is a full time scale older than the newer one
+        Post.objects.filter(pk=self.older.pk).update(
+            created_at=self.newer.created_at - hot.time_scale()
+        )
+        hot.recompute()
+
+    def assertScoreMatchesCounters(self, post):
+        post.refresh_from_db()
+        self.assertAlmostEqual(
+            post.hot_score,
+            hot.score(post.like_count, post.comment_count, post.created_at),
+        )
+
+    def trending(self, **params):
+        return self.client.get("/api/posts/trending/", params).data
+
+    def test_events_adjust_score_incrementally(self):
+        fans = [User.objects.create(username=f"fan{i}") for i in range(3)]
+        for fan in fans:
+            self.client.force_authenticate(fan)
+            self.client.put(f"/api/posts/{self.older.pk}/like/")
+        self.client.post(
+            "/api/comments/", {"post": self.older.pk, "content": "hi"}, format="json"
+        )
+        self.assertScoreMatchesCounters(self.older)
+        # 5 engagement, one time scale older: log10(5) < 1
+        self.assertEqual(
+            [p["id"] for p in self.trending()["results"]],
+            [self.newer.pk, self.older.pk],
+        )
+
+        for _ in range(5):
+            comment = self.client.post(
+                "/api/comments/",
+                {"post": self.older.pk, "content": "hi"},
+                format="json",
+            )
+        self.client.delete(f"/api/comments/{comment.data['id']}/")
+        self.client.delete(f"/api/posts/{self.older.pk}/like/")
+        self.assertScoreMatchesCounters(self.older)
+        self.assertEqual(self.trending()["results"][0]["id"], self.older.pk)
+
+    def test_cursor_pages_and_recompute(self):
+        first = self.trending(page_size=1)
+        second = self.client.get(first["next"]).data
+        self.assertEqual(
+            [first["results"][0]["id"], second["results"][0]["id"]],
+            [self.newer.pk, self.older.pk],
+        )
+
+        Post.objects.update(hot_score=0)
+        out = StringIO()
+        call_command("recompute_hot_scores", stdout=out)
+        self.assertIn("recomputed 2", out.getvalue())
+        self.assertScoreMatchesCounters(self.newer)
+
+
+class AsyncReadPathTests(TestCase):
+    """The /api/async/ views answer exactly like their sync counterparts."""
+
+    client: APIClient
+
+    def setUp(self):
+        cache.clear()
+        # detail entries are keyed by post id, which later tests reuse
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create(username="gus")
+        self.author = author = User.objects.create(username="hal")
+        self.user.following.add(author)
+        self.posts = [
+            Post.objects.create(author=author, title=f"post {i}", content="Django")
+            for i in range(3)
+        ]
+        for post in self.posts:
+            timeline.fan_out_post(post)
+        Comment.objects.create(post=self.posts[0], author=self.user, content="hi")
+        Like.objects.create(post=self.posts[1], user=self.user)
+
+        token = Token.objects.create(user=self.user)
+        self.headers = {"Authorization": f"Token {token}"}
+        self.client = APIClient(headers=self.headers)
+
+    async def assertSameAsSync(self, sync_url, async_url, **params):
+        expected = await sync_to_async(self.client.get)(sync_url, params)
+        response = await self.async_client.get(
+            async_url, params, headers=self.headers
+        )
+        self.assertEqual(response.status_code, 200)
+        # identical bodies, pagination links aside
+        self.assertEqual(
+            response.content.decode().replace("/api/async/", "/api/"),
+            expected.content.decode(),
+        )
+        return response
+
+    async def test_feed_list_search_and_detail_match(self):
+        await self.assertSameAsSync("/api/feed/", "/api/async/feed/")
+        await self.assertSameAsSync("/api/posts/", "/api/async/posts/", page_size=2)
+        await self.assertSameAsSync(
+            "/api/posts/", "/api/async/posts/", search="djan", page_size=2
+        )
+        for post in self.posts[:2]:
+            await self.assertSameAsSync(
+                f"/api/posts/{post.pk}/", f"/api/async/posts/{post.pk}/"
+            )
+
+    async def test_cursor_links_and_revalidation(self):
+        response = await self.assertSameAsSync(
+            "/api/posts/", "/api/async/posts/", page_size=2
+        )
+        second = await self.async_client.get(
+            response.json()["next"], headers=self.headers
+        )
+        self.assertEqual(
+            [post["id"] for post in second.json()["results"]], [self.posts[0].pk]
+        )
+
+        feed = await self.async_client.get("/api/async/feed/", headers=self.headers)
+        revalidated = await self.async_client.get(
+            "/api/async/feed/",
+            headers={**self.headers, "If-None-Match": feed["ETag"]},
+        )
+        self.assertEqual(revalidated.status_code, 304)
+
+    async def test_errors_use_the_drf_format(self):
+        response = await self.async_client.get("/api/async/feed/")
+        self.assertEqual(response.status_code, 401)
+        self.assertIn("detail", response.json())
+        response = await self.async_client.get(
+            "/api/async/posts/0/", headers=self.headers
+        )
+        self.assertEqual(response.status_code, 404)
+
+    async def test_detail_etag_from_async_view_guards_sync_writes(self):
+        token = await Token.objects.acreate(user=self.author)
+        headers = {"Authorization": f"Token {token}"}
+        post = self.posts[0]
+        # the async view builds the shared detail cache entry
+        response = await self.async_client.get(
+            f"/api/async/posts/{post.pk}/", headers=headers
+        )
+        etag = response["ETag"]
+
+        client = APIClient(headers=headers)
+        url = f"/api/posts/{post.pk}/"
+        self.assertEqual((await sync_to_async(client.get)(url))["ETag"], etag)
+        response = await sync_to_async(client.patch)(
+            url, {"title": "edited"}, format="json", HTTP_IF_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+
+    async def test_view_without_handler_answers_405(self):
+        class Incomplete(AsyncAPIView):
+            permission_classes = []
+
+        response = await Incomplete.as_view()(RequestFactory().get("/"))
+        self.assertEqual(response.status_code, 405)
+
+
+@skipUnless(connection.vendor == "sqlite", "parses SQLite EXPLAIN QUERY PLAN")
+class QueryPlanTests(TestCase):
+    """EXPLAIN every SELECT the hot endpoints run and reject full table scans
+    and sorted pages."""
+
+    client: APIClient
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create(username="paul")
+        author = User.objects.create(username="quinn")
+        self.user.following.add(author)
+        self.client.force_authenticate(self.user)
+        self.post = Post.objects.create(author=author, title="t", content="...")
+        Comment.objects.create(post=self.post, author=self.user, content="hi")
+        Like.objects.create(post=self.post, user=self.user)
+        self.client.post(f"/api/accounts/follow/{author.pk}/")
+        outbox.drain()
+
+    def full_scans(self, queries):
+        scans = []
+        with connection.cursor() as cursor:
+            for query in queries:
+                if not query["sql"].startswith("SELECT"):
+                    continue
+                cursor.execute("EXPLAIN QUERY PLAN " + query["sql"])
+                plan = [row[-1] for row in cursor.fetchall()]
+                # scans of materialized subqueries (window-function
+                # prefetches) are fine, scans of tables are not
+                derived = {
+                    line.split()[1]
+                    for line in plan
+                    if line.startswith(("CO-ROUTINE", "MATERIALIZE"))
+                }
+                for line in plan:
+                    words = line.replace("SCAN TABLE", "SCAN").split()
+                    if (
+                        words[0] == "SCAN"
+                        and words[1] not in derived
+                        and "USING" not in words
+                    ):
+                        scans.append(f"{line}\n    in: {query['sql']}")
+                    # a page read straight off tables must come out of an
+                    # index in order, not sort everything it matched
+                    if "TEMP B-TREE FOR ORDER BY" in line and not derived:
+                        scans.append(f"{line}\n    in: {query['sql']}")
+        return scans
+
+    def test_hot_endpoints_use_indexes(self):
+        urls = [
+            "/api/posts/",
+            f"/api/posts/{self.post.pk}/",
+            "/api/feed/",
+            "/api/posts/trending/",
+            "/api/comments/",
+            f"/api/comments/?post={self.post.pk}",
+            "/notifications/notifications/",
+            "/notifications/notifications/unread/",
+            "/notifications/notifications/unread_count/",
+        ]
+        for url in urls:
+            cache.clear()
+            with self.subTest(url=url), CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(self.full_scans(ctx.captured_queries), [])
+
+    def test_feed_pages_are_range_reads(self):
+        timeline.fan_out_post(self.post)
+        celebrity = User.objects.create(username="rita", fan_out_on_read=True)
+        self.user.following.add(celebrity)
+        Post.objects.create(author=celebrity, title="t", content="...")
+
+        page = self.client.get("/api/feed/?page_size=1")
+        self.assertIsNotNone(page.data["next"])
+        for url in ("/api/feed/?page_size=1", page.data["next"]):
+            with self.subTest(url=url), CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self.client.get(url).status_code, 200)
+                self.assertEqual(self.full_scans(ctx.captured_queries), [])
+
+        page = self.client.get("/api/posts/?page_size=1")
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(page.data["next"] or "/api/posts/")
+        self.assertEqual(self.full_scans(ctx.captured_queries), [])
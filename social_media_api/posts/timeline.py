@@ -0,0 +1,140 @@
+# posts/timeline.py
+"""Materialized home timelines (fan-out-on-write).
+
+Creating a post copies a `TimelineEntry` row to every follower of the author,
+so a feed page becomes one indexed range read on (recipient, created_at)
+instead of an IN-subquery over everyone the reader follows.
+
+Authors with very large audiences are not fanned out: once an author crosses
+`FEED_FANOUT_MAX_FOLLOWERS` they are flagged `fan_out_on_read` and their posts
+are merged into followers' feeds at read time (hybrid fan-out).
+"""
+from django.conf import settings
+from django.db.models import F, QuerySet
+
+from accounts.models import Follow
+
+from .models import Post, TimelineEntry
+
+BATCH_SIZE = 1000
+
+
+def fanout_max_followers() -> int:
+    return getattr(settings, "FEED_FANOUT_MAX_FOLLOWERS", 5000)
+
+
+def backfill_limit() -> int:
+    return getattr(settings, "FEED_BACKFILL_LIMIT", 200)
+
+
+def _bulk_insert(entries):
+    TimelineEntry.objects.bulk_create(
+        entries, batch_size=BATCH_SIZE, ignore_conflicts=True
+    )
+
+
+def fan_out_post(post: Post) -> int:
+    """Push `post` into the timeline of every follower of its author.
+
+    Returns the number of timelines written (0 for fan-out-on-read authors).
+    """
+    author = post.author
+    if author.fan_out_on_read:
+        return 0
+
+    limit = fanout_max_followers()
+    # fetch one id past the limit so the celebrity check costs no extra query
+    # read the edge table directly; the (followee, follower) index covers it
+    follower_ids = list(
+        Follow.objects.filter(followee=author).values_list("follower_id", flat=True)[
+            : limit + 1
+        ]
+    )
+    if len(follower_ids) > limit:
+        author.fan_out_on_read = True
+        author.save(update_fields=["fan_out_on_read"])
+        return 0
+
+    _bulk_insert(
+        TimelineEntry(
+            recipient_id=follower_id,
+            post=post,
+            author_id=post.author_id,
+            created_at=post.created_at,
+        )
+        for follower_id in follower_ids
+    )
+    return len(follower_ids)
+
+
+def backfill(follower, followee) -> int:
+    """Copy `followee`'s most recent posts into `follower`'s timeline."""
+    if followee.fan_out_on_read:
+        return 0
+
+    recent = Post.objects.filter(author=followee).order_by("-created_at")
+    entries = [
+        TimelineEntry(
+            recipient=follower,
+            post_id=post_id,
+            author=followee,
+            created_at=created_at,
+        )
+        for post_id, created_at in recent.values_list("pk", "created_at")[
+            : backfill_limit()
+        ]
+    ]
+    _bulk_insert(entries)
+    return len(entries)
+
+
+def trim(follower, followee) -> int:
+    """Remove every `followee` post from `follower`'s timeline."""
+    deleted, _ = TimelineEntry.objects.filter(
+        recipient=follower, author=followee
+    ).delete()
+    return deleted
+
+
+def feed_sources(user_id, posts) -> list[QuerySet[Post]]:
+    """Where the home feed of user `user_id` is read from, as filters of
+    `posts`.
+
+    Each source is annotated with `fed_at` and `fed_post`, the keys
+    `FeedCursorPagination` merges them on: the user's materialized timeline
+    entries, plus the posts of each `fan_out_on_read` author they follow.
+    Every source is a range read on an index already in that order, so a
+    page never sorts more than a page per source. Takes an id so
+    stateless-authenticated views need no user row.
+    """
+    return _feed_sources(user_id, list(_high_fanout_followees(user_id)), posts)
+
+
+async def afeed_sources(user_id, posts) -> list[QuerySet[Post]]:
+    """`feed_sources()` for async views."""
+    high_fanout = [pk async for pk in _high_fanout_followees(user_id)]
+    return _feed_sources(user_id, high_fanout, posts)
+
+
+def _high_fanout_followees(user_id):
+    return Follow.objects.filter(
+        follower_id=user_id, followee__fan_out_on_read=True
+    ).values_list("followee_id", flat=True)
+
+
+def _feed_sources(user_id, high_fanout, posts) -> list[QuerySet[Post]]:
+    # annotating after the filter reuses its join: timeline_feed_idx
+    sources = [
+        posts.filter(timeline_entries__recipient_id=user_id).annotate(
+            fed_at=F("timeline_entries__created_at"),
+            fed_post=F("timeline_entries__post_id"),
+        )
+    ]
+    # hybrid fan-out: pulled per author along post_author_idx
+    sources += [
+        posts.filter(author_id=author_id).annotate(
+            fed_at=F("created_at"), fed_post=F("id")
+        )
+        for author_id in high_fanout
+    ]
+    return sources
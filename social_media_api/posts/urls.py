@@ -1,6 +1,17 @@
 # posts/urls.py
 from rest_framework.routers import DefaultRouter
-from .views import PostViewSet, CommentViewSet, FeedView, LikePostView, UnlikePostView
+from .views import (
+    PostViewSet,
+    CommentViewSet,
+    FeedView,
+    AsyncFeedView,
+    AsyncPostListView,
+    AsyncPostDetailView,
+    LikePostView,
+    UnlikePostView,
+    TagPostsView,
+    TrendingTagsView,
+)
 from django.urls import path
 
 router = DefaultRouter()
@@ -11,6 +22,16 @@ urlpatterns = [
     path("feed/", FeedView.as_view(), name="post-feed"),
     path("posts/<int:pk>/like/", LikePostView.as_view(), name="like-post"),
     path("posts/<int:pk>/unlike/", UnlikePostView.as_view(), name="unlike-post"),
+    path("tags/", TrendingTagsView.as_view(), name="trending-tags"),
+    path("tags/<str:tag>/", TagPostsView.as_view(), name="tag-posts"),
+    # async read path, for ASGI deployments
+    path("async/feed/", AsyncFeedView.as_view(), name="async-post-feed"),
+    path("async/posts/", AsyncPostListView.as_view(), name="async-post-list"),
+    path(
+        "async/posts/<int:pk>/",
+        AsyncPostDetailView.as_view(),
+        name="async-post-detail",
+    ),
 ]
 
 urlpatterns += router.urls
@@ -1,139 +1,382 @@
 # posts/views.py
-from typing import cast
+from contextlib import contextmanager
+from functools import partial
+from asgiref.sync import sync_to_async
 from django.db import transaction
+from django.db.models import F
 from django.db.models.query import QuerySet
-from django.contrib.contenttypes.models import ContentType
+from django.utils.cache import get_conditional_response
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from rest_framework import viewsets, permissions, generics, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.authentication import TokenAuthentication, SessionAuthentication
-from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework.exceptions import NotAuthenticated
+from rest_framework.authentication import SessionAuthentication
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework.exceptions import NotAuthenticated, NotFound, ValidationError
 
-from .models import Post, Comment, Like
-from .serializers import PostSerializer, CommentSerializer
+from .models import Post, Comment, Hashtag, Like
+from .serializers import (
+    PostSerializer,
+    PostListSerializer,
+    PostSearchSerializer,
+    CommentSerializer,
+    HashtagSerializer,
+    annotate_liked_by_me,
+)
 from .permissions import IsAuthorOrReadOnly
-from .pagination import PostPagination
+from .pagination import (
+    FeedCursorPagination,
+    PostCursorPagination,
+    CommentCursorPagination,
+    PostPagination,
+    TagCursorPagination,
+    TrendingCursorPagination,
+)
+from .eager_loading import eager_load
+from .conditional import ConditionalResponseMixin
+from . import cache as post_cache, hot, likes, search, timeline
 
-from notifications.models import Notification
-from accounts.models import CustomUser
+from notifications import outbox
+from accounts.authentication import CachedTokenAuthentication
+from social_media_api.async_views import AsyncAPIView
 
 
-class PostViewSet(viewsets.ModelViewSet):
-    queryset = Post.objects.all().order_by("-created_at")
+# counters and liked_by_me change without touching updated_at, so post
+# representations are validated by ETag only
+POST_VERSION_FIELDS = (
+    "pk",
+    "updated_at",
+    "like_count",
+    "comment_count",
+    "liked_by_me",
+    "search_rank",
+)
+
+
+class PostViewSet(ConditionalResponseMixin, viewsets.ModelViewSet):
+    queryset = Post.objects.all().order_by("-created_at", "-id")
     serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticated, IsAuthorOrReadOnly]
-    pagination_class = PostPagination
-    search_fields = ["title", "content"]
+    pagination_class = PostCursorPagination
+    version_fields = POST_VERSION_FIELDS
+    version_related = ("comments", "latest_comments")
+    filter_backends = [search.PostSearchFilter]
+
+    def is_search(self):
+        return self.action == "list" and bool(search.search_terms(self.request))
+
+    @property
+    def paginator(self):
+        # ranked results have no (created_at, id) keyset; page them by number
+        if not hasattr(self, "_paginator"):
+            if self.is_search():
+                pagination = PostPagination
+            elif self.action == "trending":
+                pagination = TrendingCursorPagination
+            else:
+                pagination = self.pagination_class
+            self._paginator = pagination()
+        return self._paginator
+
+    def get_serializer_class(self):
+        if self.is_search():
+            return PostSearchSerializer
+        if self.action in ("list", "trending"):
+            return PostListSerializer
+        return PostSerializer
+
+    def get_queryset(self) -> QuerySet[Post]:
+        queryset = eager_load(super().get_queryset(), self.get_serializer_class())
+        return annotate_liked_by_me(queryset, self.request.user)
+
+    @action(detail=False, methods=["get"])
+    def trending(self, request):
+        """Posts by hot score (engagement, favouring recent posts)."""
+        return self.list(request)
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        post = serializer.save(author=self.request.user)
+        timeline.fan_out_post(post)
 
+    def retrieve(self, request, *args, **kwargs):
+        """Serve the detail body from `posts.cache`, adding `liked_by_me`.
 
-class CommentViewSet(viewsets.ModelViewSet):
-    queryset = Comment.objects.all().order_by("-created_at")
+        A cache hit costs one `EXISTS` query. Object permissions are only
+        checked when the entry is built; `IsAuthorOrReadOnly` grants every
+        read anyway.
+        """
+        post_id = self.kwargs[self.lookup_field]
+        entry = post_cache.get_or_build(post_id, self._build_detail_entry)
+        liked = bool(
+            request.user.is_authenticated
+            and Like.objects.filter(post_id=post_id, user_id=request.user.pk).exists()
+        )
+        return _detail_response(request, entry, liked)
+
+    def _build_detail_entry(self):
+        return _detail_entry(self, self.get_object())
+
+
+def _detail_entry(view, instance):
+    data = dict(view.get_serializer(instance).data)
+    # the sync and async views share the entry; hash the path PostViewSet
+    # checks If-Match against, whichever view builds it
+    path = reverse("posts-detail", args=[instance.pk])
+    # the ETag a viewer gets depends on whether they liked the post
+    etags = []
+    for liked in (False, True):
+        instance.liked_by_me = liked
+        etags.append(view.get_validators([instance], path)[0])
+    return {"data": data, "etags": etags}
+
+
+def _detail_response(request, entry, liked):
+    etag = entry["etags"][liked]
+    conditional = get_conditional_response(request, etag=etag)
+    if conditional is None:
+        conditional = Response({**entry["data"], "liked_by_me": liked})
+    conditional["ETag"] = etag
+    return conditional
+
+
+class CommentViewSet(ConditionalResponseMixin, viewsets.ModelViewSet):
+    queryset = Comment.objects.all().order_by("-created_at", "-id")
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticated, IsAuthorOrReadOnly]
+    pagination_class = CommentCursorPagination
+    use_last_modified = True
+
+    def get_queryset(self) -> QuerySet[Comment]:
+        queryset = super().get_queryset()
+        # `?post=<id>` pages through a single post's full comment thread
+        post_id = self.request.query_params.get("post")
+        if post_id is not None:
+            if not post_id.isdigit():
+                raise ValidationError({"post": "A valid integer is required."})
+            queryset = queryset.filter(post_id=post_id)
+        return eager_load(queryset, self.get_serializer_class())
 
     def perform_create(self, serializer):
-        comment = serializer.save(author=self.request.user)
-
-        # notify post author about new comment
-        post_author = comment.post.author
-        if post_author != self.request.user:
-            Notification.objects.create(
-                recipient=post_author,
-                actor=self.request.user,
-                verb="commented on your post",
-                target=comment.post,
+        with transaction.atomic():
+            comment = serializer.save(author=self.request.user)
+            Post.objects.filter(pk=comment.post_id).update(
+                **hot.counter_update(comments=1)
             )
 
+            # notify post author about new comment
+            if comment.post.author_id != self.request.user.pk:
+                outbox.enqueue(
+                    comment.post.author_id,
+                    self.request.user.pk,
+                    "commented on your post",
+                    comment.post,
+                )
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            Post.objects.filter(pk=instance.post_id, comment_count__gt=0).update(
+                **hot.counter_update(comments=-1)
+            )
 
-class FeedView(generics.ListAPIView):
+
+class FeedView(ConditionalResponseMixin, generics.ListAPIView):
     """Return posts from users the authenticated user is following,
-    ordered by most recent first, paginated."""
+    ordered by most recent first, cursor-paginated."""
 
     authentication_classes = [
-        JWTAuthentication,
-        TokenAuthentication,
+        JWTStatelessUserAuthentication,
+        CachedTokenAuthentication,
         SessionAuthentication,
     ]
     permission_classes = [IsAuthenticated]
-    serializer_class = PostSerializer
-    pagination_class = PostPagination
+    serializer_class = PostListSerializer
+    pagination_class = FeedCursorPagination
+    version_fields = POST_VERSION_FIELDS
+    version_related = ("latest_comments",)
 
     def get_queryset(self) -> QuerySet[Post]:
+        """The loading options for feed posts; `feed_sources` pick which."""
         user = self.request.user
         if not getattr(user, "is_authenticated", False):
             raise NotAuthenticated()
 
-        # Ensure static checkers know this is the project's CustomUser
-        if not isinstance(user, CustomUser):
-            raise NotAuthenticated()
+        queryset = eager_load(Post.objects.all(), self.get_serializer_class())
+        queryset = annotate_liked_by_me(queryset, user)
+        self.feed_sources = timeline.feed_sources(user.pk, queryset)
+        return queryset
+
+
+class TagPostsView(ConditionalResponseMixin, generics.ListAPIView):
+    """Posts using `#<tag>`, newest first, cursor-paginated."""
+
+    permission_classes = [IsAuthenticated]
+    serializer_class = PostListSerializer
+    pagination_class = TagCursorPagination
+    version_fields = POST_VERSION_FIELDS
+    version_related = ("latest_comments",)
+
+    def get_queryset(self) -> QuerySet[Post]:
+        tag = get_object_or_404(Hashtag, name=self.kwargs["tag"].lower())
+        # annotating after the filter reuses its join, so the page is a range
+        # read on posthashtag_recent_idx
+        queryset = (
+            Post.objects.filter(hashtag_links__hashtag=tag)
+            .annotate(tagged_at=F("hashtag_links__created_at"))
+            .order_by("-tagged_at", "-id")
+        )
+        queryset = eager_load(queryset, self.get_serializer_class())
+        return annotate_liked_by_me(queryset, self.request.user)
+
+
+class TrendingTagsView(generics.ListAPIView):
+    """The most used tags, weighting each use by how recent it is."""
+
+    permission_classes = [IsAuthenticated]
+    serializer_class = HashtagSerializer
+    pagination_class = None
+    default_limit = 20
+    max_limit = 100
+
+    def get_queryset(self):
+        try:
+            limit = int(self.request.query_params.get("limit", self.default_limit))
+        except ValueError:
+            raise ValidationError({"limit": "A valid integer is required."})
+        limit = max(1, min(limit, self.max_limit))
+        return Hashtag.objects.filter(trend_key__isnull=False).order_by(
+            "-trend_key"
+        )[:limit]
+
+
+class AsyncPostListView(ConditionalResponseMixin, AsyncAPIView):
+    """`GET /api/posts/` (including `?search=`) as an async view."""
+
+    version_fields = POST_VERSION_FIELDS
+    version_related = ("latest_comments",)
+
+    def is_search(self):
+        return bool(search.search_terms(self.request))
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            # ranked results have no keyset; page them by number, as the
+            # sync view does
+            pagination = PostPagination if self.is_search() else PostCursorPagination
+            self._paginator = pagination()
+        return self._paginator
+
+    def get_serializer_class(self):
+        return PostSearchSerializer if self.is_search() else PostListSerializer
+
+    async def aget(self, request):
+        queryset = eager_load(Post.objects.all(), self.get_serializer_class())
+        queryset = annotate_liked_by_me(queryset, request.user)
+        queryset = search.PostSearchFilter().filter_queryset(request, queryset, self)
+        return await self.alist(request, queryset)
+
+
+class AsyncPostDetailView(ConditionalResponseMixin, AsyncAPIView):
+    """`GET /api/posts/<pk>/` as an async view, sharing its detail cache."""
+
+    serializer_class = PostSerializer
+    version_fields = POST_VERSION_FIELDS
+    version_related = ("comments", "latest_comments")
+
+    async def aget(self, request, pk):
+        entry = await sync_to_async(post_cache.get_or_build)(
+            pk, partial(self._build_detail_entry, pk)
+        )
+        liked = await Like.objects.filter(post_id=pk, user_id=request.user.pk).aexists()
+        return _detail_response(request, entry, liked)
+
+    def _build_detail_entry(self, pk):
+        queryset = eager_load(Post.objects.all(), self.serializer_class)
+        queryset = annotate_liked_by_me(queryset, self.request.user)
+        return _detail_entry(self, get_object_or_404(queryset, pk=pk))
 
-        user = cast(CustomUser, user)
-        following_users = user.following.all()
-        return Post.objects.filter(author__in=following_users).order_by("-created_at")
+
+class AsyncFeedView(ConditionalResponseMixin, AsyncAPIView):
+    """`GET /api/feed/` as an async view."""
+
+    serializer_class = PostListSerializer
+    pagination_class = FeedCursorPagination
+    version_fields = POST_VERSION_FIELDS
+    version_related = ("latest_comments",)
+
+    async def aget(self, request):
+        queryset = eager_load(Post.objects.all(), self.serializer_class)
+        queryset = annotate_liked_by_me(queryset, request.user)
+        self.feed_sources = await timeline.afeed_sources(request.user.pk, queryset)
+        return await self.alist(request, queryset)
 
 
 class LikePostView(generics.GenericAPIView):
+    """Like (`PUT`, idempotent) or unlike (`DELETE`, idempotent) a post.
+
+    `POST` is kept for older clients and answers 400 for a repeated like.
+    """
+
     authentication_classes = [
-        JWTAuthentication,
-        TokenAuthentication,
+        JWTStatelessUserAuthentication,
+        CachedTokenAuthentication,
         SessionAuthentication,
     ]
     permission_classes = [IsAuthenticated]
 
-    def post(self, request, pk):
-        post = generics.get_object_or_404(Post, pk=pk)
-        user = request.user
+    def put(self, request, pk):
+        with _post_or_404():
+            _, like_count = likes.like(request.user, pk)
+        return Response({"liked": True, "like_count": like_count})
 
-        # Use atomic get_or_create to avoid race conditions where two requests
-        # could create duplicate Like rows simultaneously.
-        with transaction.atomic():
-            like, created = Like.objects.get_or_create(user=request.user, post=post)
-            if not created:
-                return Response(
-                    {"detail": "You have already liked this post."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            # create a notification only when a new like was created
-            if post.author != user:
-                Notification.objects.create(
-                    recipient=post.author,
-                    actor=user,
-                    verb="liked your post",
-                    target=post,
-                    target_content_type=ContentType.objects.get_for_model(post),
-                    target_object_id=post.pk,
-                )
+    def delete(self, request, pk):
+        with _post_or_404():
+            _, like_count = likes.unlike(request.user, pk)
+        return Response({"liked": False, "like_count": like_count})
 
+    def post(self, request, pk):
+        with _post_or_404():
+            created, like_count = likes.like(request.user, pk)
+        if not created:
+            return Response(
+                {"detail": "You have already liked this post."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
         return Response(
-            {"detail": "Post liked successfully."}, status=status.HTTP_201_CREATED
+            {"detail": "Post liked successfully.", "like_count": like_count},
+            status=status.HTTP_201_CREATED,
         )
 
 
 class UnlikePostView(generics.GenericAPIView):
     authentication_classes = [
-        JWTAuthentication,
-        TokenAuthentication,
+        JWTStatelessUserAuthentication,
+        CachedTokenAuthentication,
         SessionAuthentication,
     ]
     permission_classes = [IsAuthenticated]
 
     def post(self, request, pk):
-        post = generics.get_object_or_404(Post, pk=pk)
-        user = request.user
-        deleted_count, _ = Like.objects.filter(post=post, user=user).delete()
-        if deleted_count == 0:
+        with _post_or_404():
+            deleted, like_count = likes.unlike(request.user, pk)
+        if not deleted:
             return Response(
                 {"detail": "You have not liked this post."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-
         return Response(
-            {"detail": "Post unliked successfully."}, status=status.HTTP_200_OK
+            {"detail": "Post unliked successfully.", "like_count": like_count},
+            status=status.HTTP_200_OK,
         )
+
+
+@contextmanager
+def _post_or_404():
+    try:
+        yield
+    except Post.DoesNotExist:
+        raise NotFound("No Post matches the given query.")
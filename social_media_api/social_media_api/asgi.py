@@ -3,6 +3,10 @@ ASGI config for social_media_api project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve it with an ASGI server (uvicorn, daphne, ...) in production: the
+``/notifications/stream/`` push endpoint holds connections open, which under
+ASGI costs a coroutine each instead of a worker thread.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
@@ -0,0 +1,117 @@
+# social_media_api/async_views.py
+"""Async read-only API views, for serving hot read paths under ASGI.
+
+DRF views are synchronous: under ASGI each request occupies a thread for
+its whole duration. `AsyncAPIView` runs as a coroutine instead.
+Authentication and permission checks go through DRF in one `sync_to_async`
+hop. Subclasses implement the handler, `aget()`, which awaits its queries
+with Django's async ORM (`aiterator()`, `acount()`, `aexists()`); without
+one, GET answers 405 as DRF views do. Bodies and errors are rendered
+by DRF's JSON renderer, in the same shape as the sync views.
+
+Serializers used from `aget()` must only read preloaded data: touching a
+relation that was not selected or prefetched raises
+`SynchronousOnlyOperation` rather than quietly running a query.
+"""
+from asgiref.sync import sync_to_async
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.views import exception_handler
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+
+from accounts.authentication import CachedTokenAuthentication
+
+
+class AsyncAPIView(View):
+    http_method_names = ["get", "head"]
+    authentication_classes = [
+        JWTStatelessUserAuthentication,
+        CachedTokenAuthentication,
+        SessionAuthentication,
+    ]
+    permission_classes = [IsAuthenticated]
+    pagination_class = None
+
+    async def get(self, request, *args, **kwargs):
+        request = Request(
+            request, authenticators=[auth() for auth in self.authentication_classes]
+        )
+        self.request = request
+        try:
+            # authenticates on first access to request.user
+            await sync_to_async(self.check_permissions)(request)
+            if not hasattr(self, "aget"):
+                raise exceptions.MethodNotAllowed(request.method)
+            response = await self.aget(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        return self.finalize_response(request, response)
+
+    def check_permissions(self, request):
+        for permission in (cls() for cls in self.permission_classes):
+            if not permission.has_permission(request, self):
+                if request.authenticators and not request.successful_authenticator:
+                    raise exceptions.NotAuthenticated()
+                raise exceptions.PermissionDenied(
+                    getattr(permission, "message", None)
+                )
+
+    async def alist(self, request, queryset):
+        page = await self.paginator.apaginate_queryset(queryset, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return self.paginator.get_paginated_response(serializer.data)
+
+    def get_serializer_class(self):
+        return self.serializer_class
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault("context", self.get_serializer_context())
+        return self.get_serializer_class()(*args, **kwargs)
+
+    def get_serializer_context(self):
+        return {"request": self.request, "view": self}
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            pagination_class = self.pagination_class
+            self._paginator = pagination_class() if pagination_class else None
+        return self._paginator
+
+    def handle_exception(self, exc):
+        """Answer like `APIView.handle_exception()`: 401 with a challenge
+        from the first authenticator, DRF's error body otherwise."""
+        if isinstance(
+            exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)
+        ):
+            header = self.authentication_classes[0]().authenticate_header(
+                self.request
+            )
+            if header:
+                exc.auth_header = header
+            else:
+                exc.status_code = 403
+        response = exception_handler(
+            exc, {"view": self, "request": self.request, "args": (), "kwargs": {}}
+        )
+        if response is None:
+            raise exc
+        response.exception = True
+        return response
+
+    def finalize_response(self, request, response):
+        if isinstance(response, Response):
+            response.accepted_renderer = JSONRenderer()
+            response.accepted_media_type = "application/json"
+            response.renderer_context = {
+                "view": self,
+                "request": request,
+                "response": response,
+            }
+            response.render()
+        return response
@@ -0,0 +1,230 @@
+# social_media_api/benchmark.py
+"""In-process load generator comparing the WSGI and ASGI entry points.
+
+Requests go through the real handlers (`get_wsgi_application()` and
+`get_asgi_application()`), their middleware and the configured database.
+No HTTP server or network is involved, so the numbers isolate how each
+entry point schedules work. The WSGI side behaves like a threaded server:
+a pool of `threads` workers, each serving one request at a time, with
+excess requests waiting for a free worker. The ASGI side runs every
+request on one event loop, the way uvicorn or daphne do.
+
+Clients are closed-loop: `concurrency` of them each send their next request
+as soon as the previous one is answered, until `requests` have been sent.
+`simulated_db_latency()` adds a fixed delay to every query, standing in for
+the network round trip to a database server that a local SQLite file does
+not have.
+
+`run_authentication()` times a single authentication class instead,
+outside any view, counting the queries it makes per request.
+"""
+import asyncio
+import itertools
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from django.core.asgi import get_asgi_application
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import RequestFactory
+from rest_framework.request import Request
+
+
+@dataclass
+class Result:
+    label: str
+    concurrency: int
+    elapsed: float
+    latencies: list
+    failures: int
+
+    def percentile(self, q) -> float:
+        ordered = sorted(self.latencies)
+        return ordered[round(q * (len(ordered) - 1))]
+
+    def summary(self) -> str:
+        p50, p95, p99 = (self.percentile(q) * 1000 for q in (0.5, 0.95, 0.99))
+        return (
+            f"{self.label}: {len(self.latencies)} requests, "
+            f"{self.concurrency} concurrent, "
+            f"{len(self.latencies) / self.elapsed:.0f} req/s, "
+            f"p50 {p50:.1f} ms, p95 {p95:.1f} ms, p99 {p99:.1f} ms, "
+            f"{self.failures} failed"
+        )
+
+
+@contextmanager
+def simulated_db_latency(seconds):
+    """Sleep `seconds` before every query on connections opened meanwhile."""
+    if not seconds:
+        yield
+        return
+
+    def delay(execute, sql, params, many, context):
+        time.sleep(seconds)
+        return execute(sql, params, many, context)
+
+    def install(sender, connection, **kwargs):
+        connection.execute_wrappers.append(delay)
+
+    connection_created.connect(install)
+    try:
+        yield
+    finally:
+        connection_created.disconnect(install)
+
+
+def wsgi_get(app, url, headers, host):
+    """Send one GET through a WSGI app; returns the status code."""
+    split = urlsplit(url)
+    environ = {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": split.path,
+        "QUERY_STRING": split.query,
+        "SERVER_NAME": host,
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "REMOTE_ADDR": "127.0.0.1",
+        "HTTP_HOST": host,
+        "wsgi.url_scheme": "http",
+        "wsgi.input": BytesIO(),
+        "wsgi.errors": sys.stderr,
+    }
+    for name, value in headers.items():
+        environ["HTTP_" + name.upper().replace("-", "_")] = value
+
+    status = []
+    body = app(environ, lambda line, *args: status.append(int(line.split()[0])))
+    try:
+        for _ in body:
+            pass
+    finally:
+        body.close()
+    return status[0]
+
+
+async def asgi_get(app, url, headers, host):
+    """Send one GET through an ASGI app; returns the status code."""
+    split = urlsplit(url)
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": split.path,
+        "raw_path": split.path.encode(),
+        "query_string": split.query.encode(),
+        "headers": [(b"host", host.encode())]
+        + [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+        "server": (host, 80),
+        "client": ("127.0.0.1", 0),
+    }
+    answered = asyncio.Event()
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await answered.wait()
+        return {"type": "http.disconnect"}
+
+    status = None
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    answered.set()
+    return status
+
+
+async def _load(label, fetch, urls, requests, concurrency) -> Result:
+    latencies, failures = [], 0
+    sequence = itertools.count()
+
+    async def client():
+        nonlocal failures
+        while (i := next(sequence)) < requests:
+            started = time.perf_counter()
+            status = await fetch(urls[i % len(urls)])
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                failures += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return Result(label, concurrency, elapsed, latencies, failures)
+
+
+def run_wsgi(urls, *, headers, requests, concurrency, threads, host="localhost"):
+    app = get_wsgi_application()
+    pool = ThreadPoolExecutor(threads, thread_name_prefix="wsgi-worker")
+
+    async def fetch(url):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(pool, wsgi_get, app, url, headers, host)
+
+    try:
+        label = f"wsgi ({threads} threads)"
+        return asyncio.run(_load(label, fetch, urls, requests, concurrency))
+    finally:
+        pool.shutdown()
+
+
+def run_asgi(urls, *, headers, requests, concurrency, host="localhost", label="asgi"):
+    app = get_asgi_application()
+
+    async def fetch(url):
+        return await asgi_get(app, url, headers, host)
+
+    return asyncio.run(_load(label, fetch, urls, requests, concurrency))
+
+
+@dataclass
+class AuthResult:
+    label: str
+    iterations: int
+    elapsed: float
+    queries: int
+
+    def summary(self) -> str:
+        return (
+            f"{self.label}: "
+            f"{self.elapsed / self.iterations * 1_000_000:.1f} µs/request, "
+            f"{self.queries / self.iterations:.2f} queries/request"
+        )
+
+
+def run_authentication(label, authenticator, header, *, iterations, db_latency=0):
+    """Time `authenticator.authenticate()` for a request carrying
+    `Authorization: <header>`, after one untimed warm-up call."""
+    http_request = RequestFactory().get("/", HTTP_AUTHORIZATION=header)
+    authenticator.authenticate(Request(http_request))
+
+    queries = 0
+
+    def count(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        if db_latency:
+            time.sleep(db_latency)
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            authenticator.authenticate(Request(http_request))
+        elapsed = time.perf_counter() - started
+    return AuthResult(label, iterations, elapsed, queries)